@@ -0,0 +1,217 @@
+"""
+Count search queries for the "Promoted search results" module without a
+database write per search. Hits are buffered in process memory and saved
+with one upsert once enough of them have piled up, or enough time has
+passed, after the response that tipped it over has been sent. Hits still
+buffered when a worker process exits are lost.
+
+With SEARCH_HITS_SPOOL_TO_CACHE set, requests never touch the database for
+hits: each batch is moved to the cache instead, and the flush_search_hits
+command, run periodically, saves the batches spooled by every process.
+That needs a cache shared by the processes, which a system check enforces.
+"""
+
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.utils import timezone
+from wagtail.contrib.search_promotions.models import Query, QueryDailyHits
+from wagtail.search.utils import normalise_query_string
+
+DEFAULT_FLUSH_THRESHOLD = 100
+DEFAULT_FLUSH_INTERVAL = 60
+
+
+def get_flush_threshold():
+    return getattr(settings, "SEARCH_HITS_FLUSH_THRESHOLD", DEFAULT_FLUSH_THRESHOLD)
+
+
+def get_flush_interval():
+    return getattr(settings, "SEARCH_HITS_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+
+
+def is_spooled():
+    return getattr(settings, "SEARCH_HITS_SPOOL_TO_CACHE", False)
+
+
+def upsert_daily_hits(rows):
+    """
+    Add the hits of ``rows``, a list of ``(query_id, date, hits)``, to the
+    QueryDailyHits table in a single INSERT ... ON CONFLICT statement.
+    """
+    connection = connections[router.db_for_write(QueryDailyHits)]
+    quote = connection.ops.quote_name
+    table = quote(QueryDailyHits._meta.db_table)
+    query_id, date, hits = quote("query_id"), quote("date"), quote("hits")
+
+    if connection.vendor == "mysql":
+        conflict = f"ON DUPLICATE KEY UPDATE {hits} = {hits} + VALUES({hits})"
+    else:
+        conflict = (
+            f"ON CONFLICT ({query_id}, {date}) "
+            f"DO UPDATE SET {hits} = {table}.{hits} + EXCLUDED.{hits}"
+        )
+
+    values = ", ".join(["(%s, %s, %s)"] * len(rows))
+    params = []
+    for row_query_id, row_date, row_hits in rows:
+        params += [
+            row_query_id,
+            connection.ops.adapt_datefield_value(row_date),
+            row_hits,
+        ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({query_id}, {date}, {hits}) "
+            f"VALUES {values} {conflict}",
+            params,
+        )
+
+
+def save_hits(hits):
+    """
+    Save ``hits``, a Counter of ``(query_string, date)`` -> hits, creating
+    the Query of each new query string.
+    """
+    query_strings = {query_string for query_string, _ in hits}
+    with transaction.atomic(using=router.db_for_write(QueryDailyHits)):
+        Query.objects.bulk_create(
+            [Query(query_string=query_string) for query_string in query_strings],
+            ignore_conflicts=True,
+        )
+        query_ids = dict(
+            Query.objects.filter(query_string__in=query_strings).values_list(
+                "query_string", "pk"
+            )
+        )
+        upsert_daily_hits(
+            [
+                (query_ids[query_string], date, count)
+                for (query_string, date), count in hits.items()
+            ]
+        )
+
+
+# the spooled batches are numbered, the cache holds the number of the last
+# one written, the last one saved, and the last one seen by the previous save
+SPOOL_KEY_PREFIX = "search:hits:spool"
+SPOOL_LAST_KEY = f"{SPOOL_KEY_PREFIX}:last"
+SPOOL_SAVED_KEY = f"{SPOOL_KEY_PREFIX}:saved"
+SPOOL_SEEN_KEY = f"{SPOOL_KEY_PREFIX}:seen"
+
+
+def get_spool_key(number):
+    return f"{SPOOL_KEY_PREFIX}:{number}"
+
+
+def spool_hits(hits):
+    """
+    Add ``hits``, a Counter like for ``save_hits``, to the cache as a new
+    batch for ``save_spooled_hits``.
+    """
+    cache.add(SPOOL_LAST_KEY, 0, None)
+    number = cache.incr(SPOOL_LAST_KEY)
+    cache.set(get_spool_key(number), hits, None)
+
+
+def save_spooled_hits():
+    """
+    Save the batches of hits spooled to the cache since the last call, and
+    return how many hits they had. Only run one at a time.
+    """
+    last = cache.get(SPOOL_LAST_KEY, 0)
+    saved = cache.get(SPOOL_SAVED_KEY, 0)
+    seen = cache.get(SPOOL_SEEN_KEY, 0)
+
+    numbers = {get_spool_key(number): number for number in range(saved + 1, last + 1)}
+    batches = cache.get_many(numbers)
+    # a batch that was numbered but isn't in the cache may still be being
+    # written, unless it was missing last time already and was evicted
+    missing = [
+        number
+        for key, number in numbers.items()
+        if key not in batches and number > seen
+    ]
+    saved_to = min(missing) - 1 if missing else last
+
+    keys = [key for key in batches if numbers[key] <= saved_to]
+    hits = Counter()
+    for key in keys:
+        hits.update(batches[key])
+    if hits:
+        save_hits(hits)
+
+    cache.delete_many(keys)
+    cache.set_many({SPOOL_SAVED_KEY: saved_to, SPOOL_SEEN_KEY: last}, None)
+    return hits.total()
+
+
+class HitBuffer:
+    """
+    Counts search hits per normalized query string and day until they are
+    flushed to the database.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = Counter()
+        self.last_flush = time.monotonic()
+
+    def add(self, query_string, date=None):
+        query_string = normalise_query_string(query_string)
+        if not query_string:
+            return
+        date = date or timezone.now().date()
+        with self.lock:
+            self.hits[(query_string, date)] += 1
+
+    def clear(self):
+        """
+        Drop the buffered hits and start the flush interval again.
+        """
+        with self.lock:
+            self.hits = Counter()
+            self.last_flush = time.monotonic()
+
+    def is_due(self):
+        if not self.hits:
+            return False
+        return (
+            self.hits.total() >= get_flush_threshold()
+            or time.monotonic() - self.last_flush >= get_flush_interval()
+        )
+
+    def flush(self):
+        """
+        Save the buffered hits, or spool them to the cache with
+        SEARCH_HITS_SPOOL_TO_CACHE, and return how many there were. If that
+        fails they are kept for the next flush.
+        """
+        with self.lock:
+            hits, self.hits = self.hits, Counter()
+            self.last_flush = time.monotonic()
+        if not hits:
+            return 0
+
+        try:
+            if is_spooled():
+                spool_hits(hits)
+            else:
+                save_hits(hits)
+        except Exception:
+            with self.lock:
+                self.hits.update(hits)
+            raise
+        return hits.total()
+
+
+hit_buffer = HitBuffer()
+
+
+def record_hit(query_string):
+    hit_buffer.add(query_string)
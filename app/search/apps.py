@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class SearchConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app.search"
+
+    def ready(self):
+        from app.search.checks import check_hits_spool
+        from app.search.signal_handlers import register_signal_handlers
+
+        checks.register(check_hits_spool, checks.Tags.caches)
+        register_signal_handlers()
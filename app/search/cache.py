@@ -0,0 +1,12 @@
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_cache_shared(alias=DEFAULT_CACHE_ALIAS):
+    """
+    Whether every process sees the same entries in the cache. LocMemCache,
+    Django's default, is private to each process and DummyCache keeps
+    nothing, so anything put in them for other processes is wasted.
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
@@ -0,0 +1,18 @@
+from django.core import checks
+
+from app.search.analytics import is_spooled
+from app.search.cache import is_cache_shared
+
+
+def check_hits_spool(app_configs, **kwargs):
+    if is_spooled() and not is_cache_shared():
+        return [
+            checks.Error(
+                "SEARCH_HITS_SPOOL_TO_CACHE is set, but the default cache isn't "
+                "shared by the site's processes, so flush_search_hits can't see "
+                "the hits they spool.",
+                hint="Configure CACHES with e.g. Redis or Memcached.",
+                id="search.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.search.analytics import save_spooled_hits
+from app.search.cache import is_cache_shared
+
+
+class Command(BaseCommand):
+    help = (
+        "Save the search query hits spooled to the cache by every process, with "
+        "SEARCH_HITS_SPOOL_TO_CACHE set. Run it periodically, e.g. every minute, "
+        "and only one at a time."
+    )
+
+    def handle(self, *args, **options):
+        if not is_cache_shared():
+            # only this command's process would have spooled to the cache
+            raise CommandError(
+                "The default cache isn't shared by the site's processes, "
+                "configure CACHES with e.g. Redis or Memcached to spool hits"
+            )
+
+        hits = save_spooled_hits()
+        if options["verbosity"] > 1:
+            self.stdout.write(f"Saved {hits} search hits")
@@ -0,0 +1,128 @@
+import datetime
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from wagtail.contrib.search_promotions.models import Query
+
+from app.search.cache import is_cache_shared
+from app.search.results import cache_results, normalize_query
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the most popular recent search queries, or the ones in a file, and "
+        "cache their first pages of results. Reports the latency of each query "
+        "as JSON lines. Needs a default cache shared by the site's processes, "
+        "e.g. Redis or Memcached, not LocMemCache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            help="Read the queries from this file, one per line, instead of the logs",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Use the queries searched for in the last this many days (default: 7)",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=50,
+            help="Number of popular queries to warm (default: 50)",
+        )
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=1,
+            help="Number of result pages to warm for each query (default: 1)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Number of queries to run at once (default: 4)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            help=(
+                "Seconds to cache the results for "
+                "(default: SEARCH_RESULTS_CACHE_TIMEOUT)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if not is_cache_shared():
+            # the results would only be cached in this command's process
+            raise CommandError(
+                "The default cache isn't shared by the site's processes, "
+                "configure CACHES with e.g. Redis or Memcached to warm it"
+            )
+
+        queries = self.get_queries(options)
+        tasks = [
+            (query, number, options["timeout"])
+            for query in queries
+            for number in range(1, options["pages"] + 1)
+        ]
+
+        start = time.perf_counter()
+        if options["threads"] <= 1 or len(tasks) <= 1:
+            records = [self.warm(*task) for task in tasks]
+        else:
+            with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+                records = list(executor.map(self.warm_and_close, *zip(*tasks)))
+        elapsed = time.perf_counter() - start
+
+        for record in records:
+            self.stdout.write(json.dumps(record))
+
+        if options["verbosity"] > 1 and records:
+            slowest = max(records, key=lambda record: record["latency_ms"])
+            self.stderr.write(
+                f"Warmed {len(records)} result pages in {elapsed:.2f}s, "
+                f"slowest: {slowest['query']!r} ({slowest['latency_ms']}ms)"
+            )
+
+    def get_queries(self, options):
+        if options["file"]:
+            try:
+                with open(options["file"]) as f:
+                    lines = f.read().splitlines()
+            except OSError as e:
+                raise CommandError(f"Can't read queries: {e}")
+        else:
+            date_since = timezone.now().date() - datetime.timedelta(
+                days=options["days"]
+            )
+            lines = Query.get_most_popular(date_since).values_list(
+                "query_string", flat=True
+            )[: options["limit"]]
+
+        # queries that normalize the same share a cache entry
+        queries = dict.fromkeys(normalize_query(line) for line in lines)
+        return [query for query in queries if query]
+
+    def warm(self, query, number, timeout):
+        start = time.perf_counter()
+        entry = cache_results(query, number, timeout=timeout)
+        return {
+            "query": query,
+            "page": number,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "results": len(entry["results"]),
+        }
+
+    def warm_and_close(self, query, number, timeout):
+        # the pool's threads open their own connections, don't leave them open
+        try:
+            return self.warm(query, number, timeout)
+        finally:
+            connections.close_all()
@@ -0,0 +1,180 @@
+import hashlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from wagtail.models import Page
+
+RESULTS_PER_PAGE = 10
+
+# seconds a page of results is reused for, short enough that edits show up
+# without invalidating anything
+DEFAULT_CACHE_TIMEOUT = 60
+
+
+def get_cache_timeout():
+    return getattr(settings, "SEARCH_RESULTS_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT)
+
+
+def normalize_query(query):
+    """
+    Case and whitespace don't change the results, so "Blog  post" and
+    "blog post" share a cache entry.
+    """
+    return " ".join(query.casefold().split())
+
+
+def get_cache_key(query, number, per_page, count):
+    digest = hashlib.sha1(query.encode()).hexdigest()
+    mode = "count" if count else "next"
+    return f"search:results:2:{digest}:{per_page}:{mode}:{number}"
+
+
+class SearchResultsPage:
+    """
+    A page of search results, with the parts of Django's ``Page`` the search
+    template uses. ``total`` and ``num_pages`` are None when the results were
+    fetched without counting them.
+    """
+
+    def __init__(self, object_list, number, has_next, total=None, per_page=None):
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+        self.total = total
+        self.num_pages = None
+        if total is not None:
+            self.num_pages = max(1, -(-total // per_page))
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def get_page_number(number):
+    try:
+        return max(1, int(number))
+    except (TypeError, ValueError):
+        return 1
+
+
+def fetch_results(query, number, per_page, count):
+    """
+    Run the search for one page of results and return the cache entry for
+    it, with the pk and content type of each page found.
+    """
+    results = Page.objects.live().search(query)
+
+    total = None
+    if count:
+        total = results.count()
+        # like Paginator, a page past the end shows the last one
+        last = max(1, -(-total // per_page))
+        number = min(number, last)
+
+    start = (number - 1) * per_page
+    # one extra result tells whether there is a next page, without a COUNT
+    end = start + per_page + (0 if count else 1)
+    pages = list(results[start:end])
+
+    if count:
+        has_next = start + per_page < total
+    else:
+        has_next = len(pages) > per_page
+        pages = pages[:per_page]
+
+    entry = {
+        "results": [(page.pk, page.content_type_id) for page in pages],
+        "number": number,
+        "has_next": has_next,
+        "total": total,
+    }
+    return entry
+
+
+def get_specific_pages(results):
+    """
+    Return the live pages of ``results``, a list of ``(pk, content_type_id)``,
+    as their specific type and in that order. That is one query per page
+    type, with StreamFields deferred, as the search template only needs the
+    title, description and url of each page.
+    """
+    pks_by_type = defaultdict(list)
+    for pk, content_type_id in results:
+        pks_by_type[content_type_id].append(pk)
+
+    pages = {}
+    for content_type_id, pks in pks_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        items = model.objects.filter(pk__in=pks, live=True)
+        if hasattr(items, "defer_streamfields"):
+            items = items.defer_streamfields()
+        pages.update(items.in_bulk())
+    return [pages[pk] for pk, _ in results if pk in pages]
+
+
+def cache_results(
+    query, number=1, per_page=RESULTS_PER_PAGE, count=False, timeout=None
+):
+    """
+    Run the search for a page of results of ``query``, which must be
+    normalized already, and cache it for ``timeout`` seconds (default:
+    SEARCH_RESULTS_CACHE_TIMEOUT), replacing any cached entry. Returns the
+    cache entry.
+    """
+    entry = fetch_results(query, number, per_page, count)
+    cache.set(
+        get_cache_key(query, number, per_page, count),
+        entry,
+        get_cache_timeout() if timeout is None else timeout,
+    )
+    return entry
+
+
+def search_pages(query, number=1, per_page=RESULTS_PER_PAGE, count=False):
+    """
+    Return a SearchResultsPage of the live pages matching ``query``, as their
+    specific type.
+
+    The pks and total of each ``(query, page)`` are cached for
+    SEARCH_RESULTS_CACHE_TIMEOUT seconds, so flipping through the pages of a
+    popular query doesn't run the full-text search again. With ``count=False``
+    the results aren't counted: one extra result is fetched to tell whether
+    there is a next page instead.
+    """
+    query = normalize_query(query)
+    number = get_page_number(number)
+    if not query:
+        return SearchResultsPage([], 1, False, 0 if count else None, per_page)
+
+    entry = cache.get(get_cache_key(query, number, per_page, count))
+    if entry is None:
+        entry = cache_results(query, number, per_page, count)
+
+    return SearchResultsPage(
+        get_specific_pages(entry["results"]),
+        entry["number"],
+        entry["has_next"],
+        entry["total"],
+        per_page,
+    )
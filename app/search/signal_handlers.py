@@ -0,0 +1,32 @@
+import logging
+
+from django.core.signals import request_finished
+from django.db import connections, router
+from wagtail.contrib.search_promotions.models import QueryDailyHits
+
+from app.search.analytics import hit_buffer
+
+logger = logging.getLogger(__name__)
+
+
+def request_finished_flush_hits(sender, **kwargs):
+    # the response has been sent by now, so the upsert doesn't delay it
+    if not hit_buffer.is_due():
+        return
+
+    try:
+        hit_buffer.flush()
+    except Exception:
+        # the hits are kept for the next flush, a database error mustn't
+        # escape from the response's close()
+        logger.exception("Could not save the search query hits")
+    finally:
+        # close_old_connections has already run for this request, so don't
+        # leave the connection the upsert used open past it either
+        connection = connections[router.db_for_write(QueryDailyHits)]
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+
+
+def register_signal_handlers():
+    request_finished.connect(request_finished_flush_hits)
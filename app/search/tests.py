@@ -1,7 +1,30 @@
-from django.test import TestCase
+import datetime
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from wagtail.contrib.search_promotions.models import Query, QueryDailyHits
+from wagtail.models import Page
+
+from app.blog.models import BlogIndexPage, BlogPage
+from app.forms.models import FormPage
+from app.search.analytics import hit_buffer
+from app.search.checks import check_hits_spool
+from app.search.results import search_pages
 
 
 class SearchTestCase(TestCase):
+    def setUp(self):
+        # the buffer outlives each test, and so does its flush interval
+        hit_buffer.clear()
+
     def test_search_view(self):
         response = self.client.get("/search/")
         self.assertEqual(response.status_code, 200)
@@ -19,3 +42,220 @@ class SearchTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertNotContains(response, "No results found")
         self.assertTemplateUsed(response, "search/search.html")
+
+
+class SearchResultsTestCase(TestCase):
+    def setUp(self):
+        hit_buffer.clear()
+        cache.clear()
+        root = Page.get_first_root_node()
+        for i in range(12):
+            root.add_child(instance=BlogPage(title=f"Blog post {i}"))
+
+    def test_pages_without_count(self):
+        first = search_pages("blog post", 1)
+        self.assertEqual(len(first), 10)
+        self.assertTrue(first.has_next())
+        self.assertIsNone(first.total)
+
+        second = search_pages("blog post", 2)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+
+    def test_pages_with_count(self):
+        last = search_pages("blog post", 5, count=True)
+        self.assertEqual(last.number, 2)
+        self.assertEqual(last.total, 12)
+        self.assertEqual(last.num_pages, 2)
+
+    def test_results_are_specific(self):
+        [page] = search_pages("blog post 3")
+        self.assertIsInstance(page, BlogPage)
+
+    def test_query_count_is_independent_of_result_count(self):
+        root = Page.get_first_root_node()
+
+        def search_mix(title, count):
+            for i in range(count):
+                page_type = [BlogPage, BlogIndexPage, FormPage][i % 3]
+                root.add_child(instance=page_type(title=f"{title} {i}"))
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(f"/search/?query={title}")
+            self.assertContains(response, f"{title} {count - 1}")
+            return len(queries)
+
+        # warm the content type cache
+        search_mix("Warm", 3)
+        self.assertEqual(search_mix("Fewer", 3), search_mix("Several", 9))
+
+    def test_results_are_cached(self):
+        results = search_pages("blog post", 1)
+        # only the pages are fetched again, for the normalized query as well
+        with self.assertNumQueries(1):
+            cached = search_pages("  Blog   POST ", 1)
+        self.assertEqual([page.pk for page in cached], [page.pk for page in results])
+
+    def test_view_paginates(self):
+        response = self.client.get("/search/?query=blog+post&page=2")
+        self.assertContains(response, "Previous")
+        self.assertNotContains(response, "Next")
+
+    def test_view_past_the_last_page(self):
+        response = self.client.get("/search/?query=blog+post&page=3")
+        self.assertContains(response, "No more results")
+        self.assertContains(response, "page=2")
+
+
+class SearchAnalyticsTestCase(TestCase):
+    def setUp(self):
+        hit_buffer.clear()
+
+    def get_hits(self):
+        return dict(QueryDailyHits.objects.values_list("query__query_string", "hits"))
+
+    @override_settings(SEARCH_HITS_FLUSH_THRESHOLD=3)
+    def test_hits_are_flushed_in_batches(self):
+        self.client.get("/search/?query=Blog")
+        self.client.get("/search/?query=blog++")
+        self.assertEqual(self.get_hits(), {})
+
+        self.client.get("/search/?query=news")
+        self.assertEqual(self.get_hits(), {"blog": 2, "news": 1})
+        self.assertFalse(hit_buffer.hits)
+
+    @override_settings(SEARCH_HITS_FLUSH_THRESHOLD=1)
+    def test_failed_flush_keeps_hits(self):
+        with mock.patch(
+            "app.search.analytics.save_hits", side_effect=DatabaseError
+        ), self.assertLogs("app.search.signal_handlers", "ERROR"):
+            response = self.client.get("/search/?query=blog")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dict(hit_buffer.hits), {("blog", timezone.now().date()): 1})
+
+    def test_flush_adds_to_existing_hits(self):
+        Query.get("blog").add_hit()
+        hit_buffer.add("blog")
+        hit_buffer.add("blog")
+
+        with self.assertNumQueries(5):
+            self.assertEqual(hit_buffer.flush(), 2)
+        self.assertEqual(self.get_hits(), {"blog": 3})
+
+
+class SharedCacheMixin:
+    """
+    Use a file based cache, which unlike LocMemCache is shared by processes.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(
+            override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                        "LOCATION": directory.name,
+                    }
+                }
+            )
+        )
+
+
+@override_settings(SEARCH_HITS_SPOOL_TO_CACHE=True, SEARCH_HITS_FLUSH_THRESHOLD=1)
+class FlushSearchHitsCommandTestCase(SharedCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        hit_buffer.clear()
+
+    def get_hits(self):
+        return dict(QueryDailyHits.objects.values_list("query__query_string", "hits"))
+
+    def test_saves_spooled_hits(self):
+        self.client.get("/search/?query=blog")
+        self.client.get("/search/?query=Blog")
+        self.client.get("/search/?query=news")
+        self.assertEqual(self.get_hits(), {})
+
+        call_command("flush_search_hits")
+        self.assertEqual(self.get_hits(), {"blog": 2, "news": 1})
+
+        # the batches are only saved once
+        call_command("flush_search_hits")
+        self.assertEqual(self.get_hits(), {"blog": 2, "news": 1})
+
+    def test_waits_for_batches_being_written(self):
+        hit_buffer.add("blog")
+        hit_buffer.flush()
+        # numbered, but not written yet
+        cache.incr("search:hits:spool:last")
+        hit_buffer.add("news")
+        hit_buffer.flush()
+
+        call_command("flush_search_hits")
+        self.assertEqual(self.get_hits(), {"blog": 1})
+
+        # still missing the next time, so it was evicted
+        call_command("flush_search_hits")
+        self.assertEqual(self.get_hits(), {"blog": 1, "news": 1})
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_requires_shared_cache(self):
+        with self.assertRaisesMessage(CommandError, "isn't shared"):
+            call_command("flush_search_hits")
+        self.assertEqual(
+            [error.id for error in check_hits_spool(None)], ["search.E001"]
+        )
+
+    def test_shared_cache_passes_check(self):
+        self.assertEqual(check_hits_spool(None), [])
+
+
+class WarmSearchCacheCommandTestCase(SharedCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        hit_buffer.clear()
+        cache.clear()
+        Page.get_first_root_node().add_child(instance=BlogPage(title="Blog post"))
+
+    def call_command(self, *args):
+        out = StringIO()
+        call_command("warm_search_cache", "--threads=1", *args, stdout=out)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_warms_popular_queries(self):
+        Query.get("blog").add_hit()
+        Query.get("nothing").add_hit(date=datetime.date(2000, 1, 1))
+
+        [record] = self.call_command()
+        self.assertEqual(record["query"], "blog")
+        self.assertEqual(record["results"], 1)
+        self.assertIn("latency_ms", record)
+
+        # the first page is served from the cache now
+        with self.assertNumQueries(1):
+            search_pages("blog")
+
+    def test_warms_queries_from_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as f:
+            f.write("Blog Post\nblog  post\n\n")
+            f.flush()
+            records = self.call_command("--file", f.name, "--pages=2")
+
+        self.assertEqual(
+            [(r["query"], r["page"]) for r in records],
+            [("blog post", 1), ("blog post", 2)],
+        )
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_requires_shared_cache(self):
+        with self.assertRaisesMessage(CommandError, "isn't shared"):
+            self.call_command()
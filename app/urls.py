@@ -9,6 +9,8 @@ from app.search import views as search_views
 
 urlpatterns = [
     path("django-admin/", admin.site.urls),
+    # async endpoints of the model inspector, see model_inspector/urls.py
+    path("admin/model-inspector/", include("model_inspector.urls")),
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class ModelInspectorConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'model_inspector'
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "model_inspector"
+
+    def ready(self):
+        from model_inspector.checks import check_sample_cache
+        from model_inspector.signal_handlers import register_signal_handlers
+
+        checks.register(check_sample_cache, checks.Tags.caches)
+        register_signal_handlers()
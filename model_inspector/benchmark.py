@@ -0,0 +1,149 @@
+"""
+Benchmark the Model Inspector listing against a synthetic schema of
+dynamically created models and page types, in a throwaway test database.
+
+Used by the ``benchmark_inspector`` management command.
+"""
+
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.cache import cache
+from django.db import connection, models
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from wagtail.models import Page
+
+from model_inspector.views import IndexView
+
+APP_LABEL = "model_inspector"
+
+
+def create_model(name, base=models.Model):
+    attrs = {
+        "__module__": __name__,
+        "Meta": type("Meta", (), {"app_label": APP_LABEL}),
+    }
+    if base is models.Model:
+        attrs["name"] = models.CharField(max_length=255)
+    return type(name, (base,), attrs)
+
+
+def build_schema(model_count, page_type_count, populated=0.5):
+    """
+    Create ``model_count`` plain models and ``page_type_count`` Page subclasses
+    with their tables and content types. The first ``populated`` fraction of
+    each gets a row, the rest are left empty. Returns the created models.
+    """
+    plain = [create_model(f"BenchModel{i:04d}") for i in range(model_count)]
+    pages = [create_model(f"BenchPage{i:04d}", Page) for i in range(page_type_count)]
+
+    with connection.schema_editor() as schema_editor:
+        for model in plain + pages:
+            schema_editor.create_model(model)
+
+    root = Page.get_first_root_node()
+    for i, model in enumerate(plain):
+        if i < len(plain) * populated:
+            model.objects.create(name=model.__name__)
+    for i, model in enumerate(pages):
+        if i < len(pages) * populated:
+            root.add_child(instance=model(title=model.__name__))
+
+    for model in plain + pages:
+        ContentType.objects.get_for_model(model)
+
+    return plain + pages
+
+
+def get_request(user, exclude):
+    request = RequestFactory().get(
+        "/admin/model-inspector/", {"exclude": "true"} if exclude else {}
+    )
+    request.user = user
+    request.session = SessionBase()
+    request._messages = FallbackStorage(request)
+    return request
+
+
+def measure(user, page_size, exclude, warm):
+    view = IndexView.as_view(paginate_by=page_size)
+
+    def prepare():
+        if warm:
+            view(get_request(user, exclude)).render()
+        else:
+            cache.clear()
+        return get_request(user, exclude)
+
+    request = prepare()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = view(request)
+        rendered = time.perf_counter()
+        response.render()
+        end = time.perf_counter()
+
+    # tracemalloc slows everything down, so measure memory on a separate run
+    request = prepare()
+    tracemalloc.start()
+    view(request).render()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "wall_ms": (end - start) * 1000,
+        "view_ms": (rendered - start) * 1000,
+        "render_ms": (end - rendered) * 1000,
+        "queries": len(queries),
+        "peak_memory_kb": peak_memory / 1024,
+    }
+
+
+def run_benchmark(models, page_sizes, repeat=3):
+    """
+    Time the IndexView for each page size, with and without the exclude mode
+    and with a cold and warm cache. Each result is the median of ``repeat``
+    runs.
+    """
+    user = get_user_model().objects.create_superuser(
+        "benchmark", "benchmark@example.com", "benchmark"
+    )
+    # exclude every other generated model
+    exclude = [(APP_LABEL, model._meta.model_name) for model in models[::2]]
+
+    results = []
+    # the cold runs clear the cache, use a private one rather than the site's
+    with override_settings(
+        MODEL_INSPECTOR_EXCLUDE=exclude,
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "model_inspector_benchmark",
+            }
+        },
+    ):
+        for page_size in page_sizes:
+            for exclude_mode in [False, True]:
+                for warm in [False, True]:
+                    runs = [
+                        measure(user, page_size, exclude_mode, warm)
+                        for _ in range(repeat)
+                    ]
+                    results.append(
+                        {
+                            "page_size": page_size,
+                            "exclude": exclude_mode,
+                            "cache": "warm" if warm else "cold",
+                            **{
+                                key: round(statistics.median(r[key] for r in runs), 2)
+                                for key in runs[0]
+                            },
+                        }
+                    )
+    return results
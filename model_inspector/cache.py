@@ -0,0 +1,102 @@
+"""
+Cache the URLs of the sample instance of each content type. The signal
+handlers drop an entry when its sample changes, but only in the cache of
+the process that saved it: the default cache needs to be shared by every
+process (e.g. Redis or Memcached, not LocMemCache) for them to see it, else
+the other processes keep a stale entry until MODEL_INSPECTOR_CACHE_TIMEOUT
+runs out. The model_inspector.W001 check warns about that.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from wagtail.models import Page, get_page_models
+
+from model_inspector.finders import get_frontend_url_matrix, get_instance_urls
+from model_inspector.samples import (
+    get_sample_instances,
+    get_strategy,
+    get_strategy_spec,
+)
+
+# bump the version when the shape of the cached entries changes
+CACHE_KEY_PREFIX = "model_inspector:sample:2"
+FILTER_CHOICES_CACHE_KEY = "model_inspector:filter_choices"
+DEFAULT_CACHE_TIMEOUT = 60 * 60
+
+
+def get_cache_timeout():
+    return getattr(settings, "MODEL_INSPECTOR_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT)
+
+
+def get_cache_key(app_label, model):
+    # keyed on the content type's natural key, so the signal handlers can find
+    # an entry from a model class without looking up its ContentType
+    return f"{CACHE_KEY_PREFIX}:{app_label}.{model}"
+
+
+def get_sample_urls(contenttypes):
+    """
+    Return a dict of content type id ->
+    ``{"pk", "admin", "frontend", "frontend_matrix", "listing"}`` for the
+    sample instance of each content type, resolving and caching only the ones
+    that aren't cached already. ``frontend_matrix`` lists the url of a sample
+    page on every site and locale, see ``get_frontend_url_matrix``.
+    """
+    contenttypes = list(contenttypes)
+    keys = {ct.pk: get_cache_key(ct.app_label, ct.model) for ct in contenttypes}
+    entries = cache.get_many(keys.values())
+
+    missing = [ct for ct in contenttypes if keys[ct.pk] not in entries]
+    if missing:
+        instances = get_sample_instances(missing)
+        matrix = get_frontend_url_matrix(instances.values())
+        resolved = {}
+        for contenttype in missing:
+            instance = instances[contenttype.pk]
+            pk = instance.pk if instance is not None else None
+            resolved[keys[contenttype.pk]] = {
+                "pk": pk,
+                **get_instance_urls(instance),
+                "frontend_matrix": (matrix[pk] if isinstance(instance, Page) else []),
+            }
+        cache.set_many(resolved, get_cache_timeout())
+        entries.update(resolved)
+
+    return {ct.pk: entries[keys[ct.pk]] for ct in contenttypes}
+
+
+def invalidate_sample(model, pk, created=False):
+    """
+    Drop the cached sample for ``model`` if a change to the row ``pk`` makes it
+    stale: the sample row itself changed, the table was empty until now, or
+    the row was ``created`` and the model's sampling strategy may pick it
+    (e.g. "latest").
+    """
+    key = get_cache_key(model._meta.app_label, model._meta.model_name)
+    entry = cache.get(key)
+    if entry is None:
+        return
+    if entry["pk"] in (None, pk) or (
+        created and not get_strategy(get_strategy_spec(model)).stable_on_insert
+    ):
+        cache.delete(key)
+
+
+def invalidate_page_samples():
+    # page urls depend on the sites
+    cache.delete_many(
+        [
+            get_cache_key(model._meta.app_label, model._meta.model_name)
+            for model in [Page, *get_page_models()]
+        ]
+    )
+
+
+def get_filter_choices_cache_key(exclude):
+    return f"{FILTER_CHOICES_CACHE_KEY}:{'exclude' if exclude else 'all'}"
+
+
+def invalidate_filter_choices():
+    cache.delete_many(
+        [get_filter_choices_cache_key(False), get_filter_choices_cache_key(True)]
+    )
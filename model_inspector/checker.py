@@ -0,0 +1,279 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.db import connections
+from django.shortcuts import resolve_url
+from django.template.base import Template
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+
+DEFAULT_CONCURRENCY = 8
+
+_template_timer = threading.local()
+_original_template_render = Template.render
+# the number of TemplateTimers recording, Template.render is only patched
+# while there are any
+_template_timer_lock = threading.Lock()
+_template_timer_count = 0
+
+
+def get_concurrency():
+    return getattr(settings, "MODEL_INSPECTOR_CHECK_CONCURRENCY", DEFAULT_CONCURRENCY)
+
+
+def get_denied_paths():
+    """
+    Return the paths a redirect to means the user wasn't allowed to see the
+    URL: the login pages, and the admin dashboard Wagtail sends users to on
+    PermissionDenied.
+    """
+    paths = {resolve_url(settings.LOGIN_URL)}
+    for name in ["wagtailadmin_login", "wagtailadmin_home"]:
+        try:
+            paths.add(reverse(name))
+        except NoReverseMatch:
+            pass
+    return paths
+
+
+def _timed_template_render(self, context):
+    # only time the outermost render on threads that are recording, includes
+    # and other nested templates are part of it
+    if getattr(_template_timer, "depth", None) != 0:
+        return _original_template_render(self, context)
+
+    _template_timer.depth = 1
+    start = time.perf_counter()
+    try:
+        return _original_template_render(self, context)
+    finally:
+        _template_timer.elapsed += time.perf_counter() - start
+        _template_timer.depth = 0
+
+
+def install_template_timer():
+    global _template_timer_count
+    with _template_timer_lock:
+        if not _template_timer_count:
+            Template.render = _timed_template_render
+        _template_timer_count += 1
+
+
+def uninstall_template_timer():
+    global _template_timer_count
+    with _template_timer_lock:
+        _template_timer_count -= 1
+        if not _template_timer_count:
+            Template.render = _original_template_render
+
+
+class TemplateTimer:
+    """
+    Record the time spent rendering Django templates on the current thread.
+    Template.render is patched while any timer is recording and restored
+    once the last one exits.
+    """
+
+    def __enter__(self):
+        _template_timer.depth = 0
+        _template_timer.elapsed = 0
+        install_template_timer()
+        return self
+
+    def __exit__(self, *exc_info):
+        uninstall_template_timer()
+        self.elapsed = _template_timer.elapsed
+        _template_timer.depth = None
+
+
+class URLChecker:
+    """
+    Probe URLs in-process with Django's test client, so no request leaves the
+    server. Requests are spread across a bounded pool of worker threads, each
+    with its own client (and database connection). Redirects are followed and
+    the final response is judged, a redirect to the login page or, for
+    another admin URL, to the dashboard counts as a failure. Each result also
+    records the redirects followed, the queries run, time spent in SQL and
+    templates, and the response size.
+
+        checker = URLChecker(user=request.user, concurrency=4)
+        checker.check(["/admin/pages/3/edit/", "/blog/"])
+        # => [{"url": "/admin/pages/3/edit/", "status": 200, ...}, ...]
+
+    From async code, ``await checker.acheck(urls)`` runs the probes off the
+    event loop instead, at most ``concurrency`` at a time.
+
+    The clients share one session for ``user``, deleted again once ``check``
+    or ``acheck`` returns.
+    """
+
+    def __init__(self, user=None, host=None, concurrency=None):
+        self.user = user
+        self.host = host
+        self.concurrency = max(1, concurrency or get_concurrency())
+        self._local = threading.local()
+        self._session_lock = threading.Lock()
+        self._session_key = None
+
+    def get_session_key(self):
+        # like Client.force_login, without the user_logged_in signal, so
+        # probing doesn't update the user's last_login
+        with self._session_lock:
+            if self._session_key is None:
+                engine = import_module(settings.SESSION_ENGINE)
+                session = engine.SessionStore()
+                session[SESSION_KEY] = self.user._meta.pk.value_to_string(self.user)
+                session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+                session[HASH_SESSION_KEY] = self.user.get_session_auth_hash()
+                session.save()
+                self._session_key = session.session_key
+            return self._session_key
+
+    def close(self):
+        """
+        Delete the session the clients shared.
+        """
+        with self._session_lock:
+            if self._session_key is not None:
+                engine = import_module(settings.SESSION_ENGINE)
+                engine.SessionStore(self._session_key).delete()
+                self._session_key = None
+
+    def get_client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = Client()
+            self._local.client = client
+        if self.user is not None:
+            client.cookies[settings.SESSION_COOKIE_NAME] = self.get_session_key()
+        return client
+
+    def check_url(self, url):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        extra = {}
+        host = parts.netloc or self.host
+        if host:
+            extra["HTTP_HOST"] = host
+        if parts.scheme == "https":
+            extra["secure"] = True
+
+        status = None
+        size = None
+        exception = None
+        redirects = []
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connection))
+                for connection in connections.all()
+            ]
+            timer = stack.enter_context(TemplateTimer())
+            start = time.perf_counter()
+            try:
+                response = self.get_client().get(path, follow=True, **extra)
+                status = response.status_code
+                redirects = [url for url, _ in response.redirect_chain]
+                if not response.streaming:
+                    size = len(response.content)
+            except Exception as e:
+                exception = type(e).__name__
+            latency = time.perf_counter() - start
+
+        queries = [query for context in captured for query in context.captured_queries]
+        sql_counts = Counter(query["sql"] for query in queries)
+
+        denied = bool(redirects) and urlsplit(redirects[-1]).path in (
+            get_denied_paths() - {parts.path}
+        )
+
+        return {
+            "url": url,
+            "status": status,
+            "ok": status is not None and status < 400 and not denied,
+            "latency_ms": round(latency * 1000, 2),
+            "exception": exception,
+            "redirects": redirects,
+            "queries": len(queries),
+            "duplicate_queries": sum(count - 1 for count in sql_counts.values()),
+            "sql_ms": round(sum(float(query["time"]) for query in queries) * 1000, 2),
+            "template_ms": round(timer.elapsed * 1000, 2),
+            "size": size,
+        }
+
+    def check(self, urls):
+        try:
+            return self._check(urls)
+        finally:
+            self.close()
+
+    def _check(self, urls):
+        urls = list(urls)
+        if self.concurrency == 1 or len(urls) <= 1:
+            return [self.check_url(url) for url in urls]
+
+        tasks = queue.SimpleQueue()
+        for task in enumerate(urls):
+            tasks.put(task)
+        results = [None] * len(urls)
+
+        workers = min(self.concurrency, len(urls))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._worker, tasks, results) for _ in range(workers)
+            ]
+            for future in futures:
+                future.result()
+
+        return results
+
+    async def acheck(self, urls):
+        urls = list(urls)
+        if self.concurrency == 1 or len(urls) <= 1:
+            return await sync_to_async(self.check)(urls)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        check_url = sync_to_async(self._check_url_and_close, thread_sensitive=False)
+
+        async def probe(url):
+            async with semaphore:
+                return await check_url(url)
+
+        try:
+            return list(await asyncio.gather(*(probe(url) for url in urls)))
+        finally:
+            await sync_to_async(self.close)()
+
+    def _check_url_and_close(self, url):
+        # the executor threads outlive the probe, don't leave their
+        # connections open
+        try:
+            return self.check_url(url)
+        finally:
+            connections.close_all()
+
+    def _worker(self, tasks, results):
+        try:
+            while True:
+                try:
+                    index, url = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                results[index] = self.check_url(url)
+        finally:
+            # the test client disconnects close_old_connections, so clean up
+            # the connections this thread opened before it is reused
+            connections.close_all()
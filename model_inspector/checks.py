@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def check_sample_cache(app_configs, **kwargs):
+    # the signal handlers only reach the cache of the process that saved
+    if settings.DEBUG or not isinstance(caches["default"], LocMemCache):
+        return []
+    return [
+        checks.Warning(
+            "The default cache is LocMemCache, so a change saved in one process "
+            "only invalidates the sample URLs cached by that process, the others "
+            "keep theirs for up to MODEL_INSPECTOR_CACHE_TIMEOUT.",
+            hint="Configure CACHES with a cache the processes share, e.g. Redis.",
+            id="model_inspector.W001",
+        )
+    ]
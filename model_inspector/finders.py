@@ -0,0 +1,246 @@
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.urls import NoReverseMatch, reverse
+from django.utils import translation
+from django.utils.functional import SimpleLazyObject
+from wagtail import hooks
+from wagtail.admin.admin_url_finder import (
+    AdminURLFinder,
+    ModelAdminURLFinder,
+    NullAdminURLFinder,
+    finder_classes,
+)
+from wagtail.admin.viewsets import viewsets
+from wagtail.admin.viewsets.model import ModelViewSet
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.documents.models import AbstractDocument
+from wagtail.images.models import AbstractImage
+from wagtail.models import Collection, Page, Site, Task, Workflow
+from wagtail.snippets.models import SnippetAdminURLFinder
+from wagtail.snippets.views.snippets import SnippetViewSet
+from wagtail.utils.registry import ObjectTypeRegistry
+
+
+def get_page_listing_url(page):
+    return reverse("wagtailadmin_explore", args=(page.pk,))
+
+
+# url names, or callables taking the instance, for models whose listing
+# can't be found from a registered viewset
+DEFAULT_LISTING_URLS = {
+    Workflow: "wagtailadmin_workflows:index",
+    Task: "wagtailadmin_workflows:task_index",
+    Collection: "wagtailadmin_collections:index",
+    AbstractDocument: "wagtaildocs:index",
+    AbstractImage: "wagtailimages:index",
+    Redirect: "wagtailredirects:index",
+    Page: get_page_listing_url,
+}
+
+
+class ListingURLRegistry:
+    """
+    Maps model classes (and their subclasses) to an admin listing url.
+
+    Entries come from DEFAULT_LISTING_URLS, the index view of every registered
+    ModelViewSet and the ``register_model_inspector_listing_urls`` hook, whose
+    functions return a dict of model -> url name (or callable taking the
+    instance). The registry is built on first use, once the admin urls and
+    viewsets are loaded, and the result for each model class is memoized.
+    """
+
+    def __init__(self):
+        self.registry = None
+        self.urls_by_model = {}
+
+    def populate(self):
+        registry = ObjectTypeRegistry()
+
+        for model, url in DEFAULT_LISTING_URLS.items():
+            registry.register(model, value=url)
+
+        for viewset in viewsets.viewsets:
+            if isinstance(viewset, ModelViewSet):
+                view_name = "list" if isinstance(viewset, SnippetViewSet) else "index"
+                registry.register(viewset.model, value=viewset.get_url_name(view_name))
+
+        for fn in hooks.get_hooks("register_model_inspector_listing_urls"):
+            for model, url in fn().items():
+                registry.register(model, value=url)
+
+        self.registry = registry
+
+    def get_url(self, model):
+        """
+        Return the listing url for the model, a callable that takes an instance
+        and returns it, or None if the model isn't registered.
+        """
+        try:
+            return self.urls_by_model[model]
+        except KeyError:
+            pass
+
+        if self.registry is None:
+            self.populate()
+
+        url = self.registry.get_by_type(model)
+        if isinstance(url, str):
+            try:
+                url = reverse(url)
+            except NoReverseMatch:
+                url = None
+
+        self.urls_by_model[model] = url
+        return url
+
+
+listing_urls = ListingURLRegistry()
+
+
+class ModelInspectorAdminURLFinder(AdminURLFinder):
+    def get_listing_url(self, instance):
+        if not instance:
+            return None
+
+        url = listing_urls.get_url(type(instance))
+        if callable(url):
+            return url(instance)
+        elif url:
+            return url
+
+        # Fallback to manipluating the admin edit url parts
+        try:
+            parts = super().get_edit_url(instance).strip("/").split("/")
+            try:
+                pos = parts.index("edit")
+            except ValueError:
+                pos = len(parts)
+
+            return f'/{"/".join(parts[:pos])}/'
+        except AttributeError:
+            return None
+
+
+# lazy, as the finder loads wagtail_hooks modules which import the views
+admin_url_finder = SimpleLazyObject(ModelInspectorAdminURLFinder)
+
+
+def reads_instance_fields(model):
+    """
+    Return whether finding the URLs of an instance of ``model`` reads more
+    than its pk: it has a ``get_url``, a callable listing url or an admin URL
+    finder that builds the edit url from other fields (e.g. the ``site_id`` of
+    site settings). Instances of the other models can be built from the pk.
+    """
+    if hasattr(model, "get_url") or callable(listing_urls.get_url(model)):
+        return True
+
+    hooks.search_for_hooks()
+    finder_class = finder_classes.get_by_type(model)
+    if finder_class is None or issubclass(finder_class, NullAdminURLFinder):
+        return False
+    if issubclass(finder_class, SnippetAdminURLFinder):
+        return finder_class.get_edit_url is not SnippetAdminURLFinder.get_edit_url
+    return not (
+        issubclass(finder_class, ModelAdminURLFinder)
+        and finder_class.construct_edit_url is ModelAdminURLFinder.construct_edit_url
+        and finder_class.get_edit_url is ModelAdminURLFinder.get_edit_url
+    )
+
+
+def get_instance_urls(instance):
+    """
+    Return the admin, frontend and listing URLs for a sample instance,
+    any of which may be None.
+    """
+    try:
+        frontend_url = instance.get_url()
+    except AttributeError:
+        frontend_url = None
+
+    return {
+        "admin": admin_url_finder.get_edit_url(instance),
+        "frontend": frontend_url,
+        "listing": admin_url_finder.get_listing_url(instance),
+    }
+
+
+class SiteRootPathIndex:
+    """
+    Resolve the URLs of a page on every site and locale that routes it, from
+    one read of ``Site.get_site_root_paths()`` (cached by Wagtail) and without
+    any tree queries. Build one per request or sweep.
+    """
+
+    def __init__(self):
+        self.root_paths = Site.get_site_root_paths()
+        self.i18n = getattr(settings, "WAGTAIL_I18N_ENABLED", False)
+        self.append_slash = getattr(settings, "WAGTAIL_APPEND_SLASH", True)
+
+    def reverse(self, path, language_code):
+        # as Page.get_url_parts does
+        try:
+            if self.i18n:
+                with translation.override(language_code):
+                    page_path = reverse("wagtail_serve", args=(path,))
+            else:
+                page_path = reverse("wagtail_serve", args=(path,))
+        except NoReverseMatch:
+            return None
+
+        if not self.append_slash and page_path != "/":
+            page_path = page_path.rstrip("/")
+        return page_path
+
+    def get_urls(self, page):
+        """
+        Return a list of ``{"url", "label"}`` for every site root path that
+        routes ``page``, in the order Page.get_url_parts prefers them.
+        """
+        if type(page).get_url_parts is not Page.get_url_parts:
+            # custom routing, trust the page
+            url = page.get_full_url()
+            return [{"url": url, "label": urlsplit(url).netloc}] if url else []
+
+        urls = []
+        for root_path in self.root_paths:
+            if not page.url_path.startswith(root_path.root_path):
+                continue
+            start = len(root_path.root_path)
+            page_path = self.reverse(page.url_path[start:], root_path.language_code)
+            if page_path is None:
+                continue
+
+            label = urlsplit(root_path.root_url).netloc
+            if self.i18n:
+                label = f"{label} ({root_path.language_code})"
+            urls.append({"url": root_path.root_url + page_path, "label": label})
+        return urls
+
+
+def get_frontend_url_matrix(instances):
+    """
+    Return a dict of page pk -> the ``{"url", "label"}`` of every site and
+    locale the page, or any of its translations, is routable on. Pages come
+    first, then their translations, which are fetched in a single query.
+    """
+    pages = [instance for instance in instances if isinstance(instance, Page)]
+    index = SiteRootPathIndex()
+    matrix = {page.pk: index.get_urls(page) for page in pages}
+
+    if index.i18n and pages:
+        translations = defaultdict(list)
+        for translation_page in (
+            Page.objects.filter(translation_key__in={p.translation_key for p in pages})
+            .exclude(pk__in=matrix)
+            .only("url_path", "translation_key")
+        ):
+            translations[translation_page.translation_key].append(translation_page)
+
+        for page in pages:
+            for translation_page in translations[page.translation_key]:
+                matrix[page.pk] += index.get_urls(translation_page)
+
+    return matrix
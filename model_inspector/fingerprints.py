@@ -0,0 +1,191 @@
+"""
+Fingerprint the inputs that decide how a content type's sample pages render,
+so a sweep can skip the content types that haven't changed since they last
+passed.
+"""
+
+import hashlib
+import os
+from collections import defaultdict
+
+import django
+import wagtail
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines, loader
+from django.template.backends.django import DjangoTemplates
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from wagtail.models import Page
+from wagtail.snippets.models import get_snippet_models
+
+from model_inspector.samples import get_sample_instances
+
+REVISION_FIELDS = ["latest_revision", "last_published_at"]
+
+# (path, mtime_ns) -> content hash, so unchanged files aren't read again
+_file_hashes = {}
+
+
+def get_model_templates(model):
+    """
+    Return the names of the templates the frontend and edit views of ``model``
+    render with.
+    """
+    if model is None:
+        return []
+    if issubclass(model, Page):
+        names = [model.template, "wagtailadmin/pages/edit.html"]
+        if model.ajax_template:
+            names.append(model.ajax_template)
+        return names
+    if model in get_snippet_models():
+        return ["wagtailsnippets/snippets/edit.html"]
+    return ["wagtailadmin/generic/edit.html"]
+
+
+def get_template_paths(template_name, seen=None):
+    """
+    Return the file paths of ``template_name`` and the templates it extends or
+    includes by a literal name.
+    """
+    seen = set() if seen is None else seen
+    if template_name in seen:
+        return []
+    seen.add(template_name)
+
+    try:
+        template = loader.get_template(template_name).template
+    except TemplateDoesNotExist:
+        return []
+    except TemplateSyntaxError:
+        # a broken template still changes when it is fixed
+        return find_template_paths(template_name)[:1]
+
+    paths = [template.origin.name]
+    for node in template.nodelist.get_nodes_by_type((ExtendsNode, IncludeNode)):
+        expression = (
+            node.parent_name if isinstance(node, ExtendsNode) else node.template
+        )
+        if isinstance(expression.var, str):
+            paths += get_template_paths(expression.var, seen)
+    return paths
+
+
+def find_template_paths(template_name):
+    """
+    Return the paths the Django template engines would load ``template_name``
+    from, without parsing it.
+    """
+    paths = []
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for template_loader in engine.engine.template_loaders:
+            for origin in template_loader.get_template_sources(template_name):
+                if os.path.exists(origin.name):
+                    paths.append(origin.name)
+    return paths
+
+
+def get_file_hash(path):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return ""
+    key = (path, mtime)
+    if key not in _file_hashes:
+        with open(path, "rb") as f:
+            _file_hashes[key] = hashlib.sha1(f.read()).hexdigest()
+    return _file_hashes[key]
+
+
+def get_migration_state(using=DEFAULT_DB_ALIAS):
+    """
+    Return a dict of app label -> a hash of its applied migrations.
+    """
+    applied = defaultdict(list)
+    for app_label, name in MigrationRecorder(connections[using]).applied_migrations():
+        applied[app_label].append(name)
+    return {
+        app_label: hashlib.sha1("\0".join(sorted(names)).encode()).hexdigest()
+        for app_label, names in applied.items()
+    }
+
+
+def get_revision_fields(model):
+    fields = []
+    for name in REVISION_FIELDS:
+        try:
+            fields.append(model._meta.get_field(name))
+        except FieldDoesNotExist:
+            pass
+    return fields
+
+
+def get_revision_state(instances):
+    """
+    Return a dict of ``(model, pk)`` -> ``[latest_revision_id, last_published_at]``
+    for the instances with those fields, with a query per model that defines
+    them (one for all pages).
+    """
+    pks_by_model = defaultdict(set)
+    for instance in instances:
+        if instance is None:
+            continue
+        fields = get_revision_fields(type(instance))
+        if fields:
+            attnames = tuple(field.attname for field in fields)
+            pks_by_model[(fields[0].model, attnames)].add(instance.pk)
+
+    state = {}
+    for (model, attnames), pks in pks_by_model.items():
+        for pk, *values in model._base_manager.filter(pk__in=pks).values_list(
+            "pk", *attnames
+        ):
+            state[(model, pk)] = values
+    return state
+
+
+def get_fingerprints(contenttypes, instances=None):
+    """
+    Return a dict of content type id -> a hex digest of everything its checks
+    depend on: the Django and Wagtail versions, the app's migration state, the
+    templates its views render and its sample instance's pk, latest revision
+    and publish date. Pass ``instances`` if the sample instances have been
+    fetched already.
+    """
+    contenttypes = list(contenttypes)
+    if instances is None:
+        instances = get_sample_instances(contenttypes)
+    migrations = get_migration_state()
+    revisions = get_revision_state(instances.values())
+    template_hashes = {}
+
+    fingerprints = {}
+    for contenttype in contenttypes:
+        model = contenttype.model_class()
+        parts = [
+            django.get_version(),
+            wagtail.__version__,
+            migrations.get(contenttype.app_label, ""),
+        ]
+        for template_name in get_model_templates(model):
+            if template_name not in template_hashes:
+                template_hashes[template_name] = [
+                    get_file_hash(path) for path in get_template_paths(template_name)
+                ]
+            parts += template_hashes[template_name]
+
+        instance = instances[contenttype.pk]
+        if instance is not None:
+            parts.append(str(instance.pk))
+            fields = get_revision_fields(type(instance))
+            if fields:
+                values = revisions.get((fields[0].model, instance.pk), [])
+                parts += [str(value) for value in values]
+
+        fingerprints[contenttype.pk] = hashlib.sha1(
+            "\0".join(parts).encode()
+        ).hexdigest()
+    return fingerprints
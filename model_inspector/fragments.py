@@ -0,0 +1,95 @@
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+PLACEHOLDER = "__model_inspector_{}__"
+
+
+class FragmentRenderer:
+    """
+    Render the small template fragments used in the IndexView table without a
+    template lookup and Context per cell.
+
+    Fragments without variables are rendered once and reused. Fragments with
+    variables are rendered once with placeholder values and turned into a
+    ``format_html`` format string, so the templates stay the source of truth
+    as long as they output their variables unfiltered.
+    """
+
+    def __init__(self):
+        self._static = {}
+        self._formats = {}
+
+    def render_static(self, template_name):
+        try:
+            return self._static[template_name]
+        except KeyError:
+            html = mark_safe(render_to_string(template_name))
+            self._static[template_name] = html
+            return html
+
+    def render(self, template_name, **kwargs):
+        key = (template_name, frozenset(kwargs))
+        try:
+            format_string = self._formats[key]
+        except KeyError:
+            format_string = self.compile(template_name, kwargs)
+            self._formats[key] = format_string
+        return format_html(format_string, **kwargs)
+
+    def compile(self, template_name, names):
+        html = render_to_string(
+            template_name, {name: PLACEHOLDER.format(name) for name in names}
+        )
+        html = html.replace("{", "{{").replace("}", "}}")
+        for name in names:
+            html = html.replace(PLACEHOLDER.format(name), "{%s}" % name)
+        return html
+
+    def link(self, url):
+        return self.render("model_inspector/fragments/link_secondary.html", url=url)
+
+    def does_not_exist(self):
+        return self.render_static("model_inspector/fragments/does_not_exist.html")
+
+    def link_or_does_not_exist(self, url):
+        return self.link(url) if url else self.does_not_exist()
+
+    def frontend_links(self, url, matrix):
+        # the first url of the matrix is the one ``url`` resolves to
+        links = [self.link_or_does_not_exist(url)]
+        for entry in matrix[1:]:
+            links.append(
+                self.render(
+                    "model_inspector/fragments/link_site.html",
+                    url=entry["url"],
+                    label=entry["label"],
+                )
+            )
+        return mark_safe(" ".join(links))
+
+    def pending(self, content_type_id, kind):
+        return self.render(
+            "model_inspector/fragments/pending.html",
+            content_type_id=content_type_id,
+            kind=kind,
+        )
+
+    def metric(self, metric):
+        return self.render("model_inspector/fragments/metric.html", metric=metric)
+
+    def check_button(self, content_type_id):
+        return self.render(
+            "model_inspector/fragments/check_button.html",
+            content_type_id=content_type_id,
+        )
+
+    def copy_button(self, app_label, model):
+        return self.render(
+            "model_inspector/fragments/copy_button.html",
+            app_label=app_label,
+            model=model,
+        )
+
+
+fragments = FragmentRenderer()
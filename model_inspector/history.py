@@ -0,0 +1,213 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Max
+
+from model_inspector.models import CheckResult, CheckRun
+
+RECORD_BATCH_SIZE = 500
+
+# a URL has regressed if it got this many times slower, and at least this
+# many milliseconds slower, or runs this many more queries, than in the
+# baseline run
+DEFAULT_LATENCY_THRESHOLD = 1.5
+DEFAULT_LATENCY_MIN_DELTA_MS = 50
+DEFAULT_QUERIES_THRESHOLD = 5
+
+
+def get_latency_threshold():
+    return getattr(
+        settings, "MODEL_INSPECTOR_LATENCY_THRESHOLD", DEFAULT_LATENCY_THRESHOLD
+    )
+
+
+def get_latency_min_delta_ms():
+    return getattr(
+        settings, "MODEL_INSPECTOR_LATENCY_MIN_DELTA_MS", DEFAULT_LATENCY_MIN_DELTA_MS
+    )
+
+
+def get_queries_threshold():
+    return getattr(
+        settings, "MODEL_INSPECTOR_QUERIES_THRESHOLD", DEFAULT_QUERIES_THRESHOLD
+    )
+
+
+def record_run(records, user=None, source="admin", is_baseline=False):
+    """
+    Save a CheckRun for the checker results in ``records``, each one a checker
+    result dict with the ``content_type`` id and url ``kind`` added.
+    """
+    with transaction.atomic():
+        run = CheckRun.objects.create(user=user, source=source, is_baseline=is_baseline)
+        add_results(run, records)
+    return run
+
+
+def add_results(run, records):
+    """
+    Save the checker results in ``records`` to ``run``, see ``record_run``.
+    """
+    CheckResult.objects.bulk_create(
+        [
+            CheckResult(
+                run=run,
+                content_type_id=record["content_type"],
+                kind=record["kind"],
+                url=record["url"],
+                status=record["status"],
+                ok=record["ok"],
+                latency_ms=record["latency_ms"],
+                queries=record.get("queries"),
+                duplicate_queries=record.get("duplicate_queries"),
+                exception=record["exception"] or "",
+                fingerprint=record.get("fingerprint", ""),
+            )
+            for record in records
+        ],
+        batch_size=RECORD_BATCH_SIZE,
+    )
+
+
+def get_baseline(run):
+    """
+    Return the run to compare ``run`` against: the latest earlier run marked
+    as a baseline, or failing that the run before it.
+    """
+    earlier = CheckRun.objects.filter(pk__lt=run.pk)
+    return earlier.filter(is_baseline=True).first() or earlier.first()
+
+
+def by_worst_result(results):
+    """
+    Key ``results`` by ``(content_type_id, kind)``. When several sample
+    instances of a model were checked, keep the failing or slowest one.
+    """
+    worst = {}
+    for result in results:
+        key = (result.content_type_id, result.kind)
+        other = worst.get(key)
+        if other is None or (result.ok, -result.latency_ms) < (
+            other.ok,
+            -other.latency_ms,
+        ):
+            worst[key] = result
+    return worst
+
+
+def get_results(run):
+    return by_worst_result(CheckResult.objects.filter(run=run))
+
+
+def get_latest_results(content_type_ids):
+    """
+    Return a dict of ``(content_type_id, kind)`` -> the most recent CheckResult
+    (the worst one, if several samples were checked) for the given content
+    types. The latest run of each content type and kind comes from the
+    ``(content_type, kind, run)`` index, then only the results of those runs
+    are fetched, in two queries whatever the length of the history.
+    """
+    latest_runs = set(
+        CheckResult.objects.filter(content_type_id__in=content_type_ids)
+        .order_by()
+        .values("content_type_id", "kind")
+        .annotate(latest_run_id=Max("run_id"))
+        .values_list("content_type_id", "kind", "latest_run_id")
+    )
+    if not latest_runs:
+        return {}
+
+    results = CheckResult.objects.filter(
+        content_type_id__in={content_type_id for content_type_id, _, _ in latest_runs},
+        run_id__in={run_id for _, _, run_id in latest_runs},
+    )
+    return by_worst_result(
+        result
+        for result in results
+        if (result.content_type_id, result.kind, result.run_id) in latest_runs
+    )
+
+
+def get_unchanged_contenttype_ids(fingerprints):
+    """
+    Return the ids of the content types in ``fingerprints`` (content type id ->
+    fingerprint) whose latest check results all passed with the same
+    fingerprint, so checking them again would tell us nothing new.
+    """
+    results_by_contenttype = defaultdict(list)
+    for (content_type_id, _kind), result in get_latest_results(fingerprints).items():
+        results_by_contenttype[content_type_id].append(result)
+
+    return {
+        content_type_id
+        for content_type_id, results in results_by_contenttype.items()
+        if all(
+            result.ok and result.fingerprint == fingerprints[content_type_id]
+            for result in results
+        )
+    }
+
+
+def compare_runs(
+    run,
+    baseline,
+    latency_threshold=None,
+    queries_threshold=None,
+    latency_min_delta_ms=None,
+):
+    """
+    Compare the results of ``run`` with those of ``baseline`` per content type
+    and url kind. Returns a list of dicts, regressions first, flagging the
+    URLs that started failing or whose latency or query count went past the
+    thresholds. The latency has to go past both the ratio and the absolute
+    ``latency_min_delta_ms``, so jitter on fast URLs isn't a regression.
+    """
+    if latency_threshold is None:
+        latency_threshold = get_latency_threshold()
+    if latency_min_delta_ms is None:
+        latency_min_delta_ms = get_latency_min_delta_ms()
+    if queries_threshold is None:
+        queries_threshold = get_queries_threshold()
+
+    current = get_results(run)
+    previous = get_results(baseline) if baseline else {}
+
+    rows = []
+    for (content_type_id, kind), result in current.items():
+        before = previous.get((content_type_id, kind))
+        row = {
+            "content_type": ContentType.objects.get_for_id(content_type_id),
+            "kind": kind,
+            "result": result,
+            "baseline": before,
+            "failed": False,
+            "latency_regressed": False,
+            "queries_regressed": False,
+        }
+        if before is not None:
+            row["failed"] = before.ok and not result.ok
+            row["latency_regressed"] = (
+                result.latency_ms > before.latency_ms * latency_threshold
+                and result.latency_ms - before.latency_ms >= latency_min_delta_ms
+            )
+            row["queries_regressed"] = (
+                result.queries is not None
+                and before.queries is not None
+                and result.queries - before.queries >= queries_threshold
+            )
+        row["regressed"] = (
+            row["failed"] or row["latency_regressed"] or row["queries_regressed"]
+        )
+        rows.append(row)
+
+    rows.sort(
+        key=lambda row: (
+            not row["regressed"],
+            row["content_type"].app_label,
+            row["content_type"].model,
+            row["kind"],
+        )
+    )
+    return rows
@@ -0,0 +1,218 @@
+"""
+Replay a corpus of URLs, seeded from the sample instances the Model
+Inspector finds and the site's search queries, against the site in-process
+or over HTTP, and summarize the latency, throughput and queries per request.
+
+Used by the ``load_test`` management command.
+"""
+
+import datetime
+import itertools
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urlsplit
+from urllib.request import Request, urlopen
+
+from django.apps import apps
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from wagtail.models import Page
+
+from model_inspector.checker import URLChecker
+from model_inspector.samples import get_sample_instance_lists
+from model_inspector.sweeps import get_sample_urls, get_sweep_contenttypes
+
+LOAD_TEST_KINDS = ["admin", "frontend", "listing", "search"]
+
+POPULAR_QUERY_DAYS = 7
+POPULAR_QUERY_LIMIT = 50
+
+
+def get_search_queries():
+    """
+    Return the popular queries of the last week from the search promotions
+    logs, if that app is installed.
+    """
+    if not apps.is_installed("wagtail.contrib.search_promotions"):
+        return []
+
+    from wagtail.contrib.search_promotions.models import Query
+
+    date_since = timezone.now().date() - datetime.timedelta(days=POPULAR_QUERY_DAYS)
+    return list(
+        Query.get_most_popular(date_since).values_list("query_string", flat=True)[
+            :POPULAR_QUERY_LIMIT
+        ]
+    )
+
+
+def get_corpus(kinds, queries=None, include_excluded=False):
+    """
+    Return a list of ``(kind, url)`` to replay: the sample URLs of every
+    content type, and a search for each query. Without popular queries, the
+    titles of the sample pages are searched for instead, so every page type
+    turns up in the results.
+    """
+    contenttypes = get_sweep_contenttypes(include_excluded)
+    samples = get_sample_instance_lists(contenttypes)
+    corpus = [
+        (kind, url)
+        for _, kind, url in get_sample_urls(contenttypes, samples)
+        if kind in kinds
+    ]
+
+    if "search" in kinds:
+        try:
+            search_url = reverse("search")
+        except NoReverseMatch:
+            return corpus
+
+        if not queries:
+            queries = get_search_queries()
+        if not queries:
+            queries = sorted(
+                {
+                    instances[0].title
+                    for instances in samples.values()
+                    if instances and isinstance(instances[0], Page)
+                }
+            )
+        corpus += [
+            ("search", f"{search_url}?{urlencode({'query': query})}")
+            for query in queries
+        ]
+    return corpus
+
+
+def get_request_urls(corpus, requests):
+    # cycle through the corpus until there are enough requests
+    return list(itertools.islice(itertools.cycle(corpus), requests))
+
+
+def run_in_process(urls, concurrency, user=None, host=None):
+    """
+    Request ``urls`` through Django's test client, ``concurrency`` at a time.
+    Each result includes the number of queries the request ran.
+    """
+    return URLChecker(user=user, host=host, concurrency=concurrency).check(urls)
+
+
+def fetch(base_url, url, timeout):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    headers = {"Host": parts.netloc} if parts.netloc else {}
+
+    status = None
+    start = time.perf_counter()
+    try:
+        with urlopen(
+            Request(base_url.rstrip("/") + path, headers=headers), timeout=timeout
+        ) as response:
+            response.read()
+            status = response.status
+    except HTTPError as e:
+        status = e.code
+    except (URLError, OSError):
+        pass
+    latency = time.perf_counter() - start
+
+    return {
+        "url": url,
+        "status": status,
+        "ok": status is not None and status < 400,
+        "latency_ms": round(latency * 1000, 2),
+        "queries": None,
+    }
+
+
+def run_http(urls, concurrency, base_url, timeout=30):
+    """
+    Request ``urls`` from a running server at ``base_url``, e.g.
+    ``http://localhost:8000``, ``concurrency`` at a time. The server's
+    queries can't be counted from here.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda url: fetch(base_url, url, timeout), urls))
+
+
+def percentile(values, percent):
+    # nearest rank, so the result is always one of the measured values
+    values = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[rank - 1]
+
+
+def summarize(results, elapsed):
+    """
+    Return the request count, errors, requests per second, latency
+    percentiles and mean queries per request of ``results``.
+    """
+    if not results:
+        return {"requests": 0}
+
+    latencies = [result["latency_ms"] for result in results]
+    queries = [result["queries"] for result in results if result["queries"] is not None]
+
+    return {
+        "requests": len(results),
+        "errors": sum(not result["ok"] for result in results),
+        "requests_per_second": round(len(results) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+        },
+        "queries_per_request": (
+            round(sum(queries) / len(queries), 2) if queries else None
+        ),
+    }
+
+
+def run_load_test(
+    corpus, requests, concurrency, base_url=None, user=None, host=None, warmup=0
+):
+    """
+    Replay ``corpus`` for ``requests`` requests, after ``warmup`` untimed
+    ones, and return the summary of all of them and of each kind of URL.
+    """
+    concurrency = max(1, concurrency)
+
+    def run(urls):
+        if base_url:
+            return run_http(urls, concurrency, base_url)
+        return run_in_process(urls, concurrency, user, host)
+
+    if warmup:
+        run([url for _, url in get_request_urls(corpus, warmup)])
+
+    requested = get_request_urls(corpus, requests)
+    start = time.perf_counter()
+    results = run([url for _, url in requested])
+    elapsed = time.perf_counter() - start
+
+    by_kind = {}
+    for (kind, _), result in zip(requested, results):
+        by_kind.setdefault(kind, []).append(result)
+
+    return {
+        **summarize(results, elapsed),
+        "duration_s": round(elapsed, 2),
+        # the kinds overlap in time, so their throughput isn't meaningful
+        "kinds": {
+            kind: {
+                key: value
+                for key, value in summarize(kind_results, elapsed).items()
+                if key != "requests_per_second"
+            }
+            for kind, kind_results in sorted(by_kind.items())
+        },
+        "slowest": [
+            {"url": result["url"], "latency_ms": result["latency_ms"]}
+            for result in sorted(results, key=lambda r: -r["latency_ms"])[:10]
+        ],
+    }
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from model_inspector.fragments import FragmentRenderer
+
+URL = "/admin/pages/3/edit/"
+
+
+def render_row_with_templates():
+    # the per-cell render_to_string calls IndexView used to make
+    for _ in range(3):
+        render_to_string("model_inspector/fragments/link_secondary.html", {"url": URL})
+    render_to_string("model_inspector/fragments/does_not_exist.html")
+    render_to_string(
+        "model_inspector/fragments/check_button.html", {"content_type_id": 1}
+    )
+    render_to_string(
+        "model_inspector/fragments/copy_button.html",
+        {"app_label": "home", "model": "homepage"},
+    )
+
+
+def render_row_with_fragments(fragments):
+    for _ in range(3):
+        fragments.link(URL)
+    fragments.does_not_exist()
+    fragments.check_button(1)
+    fragments.copy_button("home", "homepage")
+
+
+class Command(BaseCommand):
+    help = "Compare the cost of rendering the IndexView table cells per page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=50, help="Rows per page (default: 50)"
+        )
+        parser.add_argument(
+            "--pages", type=int, default=100, help="Pages to render (default: 100)"
+        )
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        pages = options["pages"]
+
+        def per_page(make_row_renderer):
+            start = time.perf_counter()
+            for _ in range(pages):
+                render_row = make_row_renderer()
+                for _ in range(rows):
+                    render_row()
+            return (time.perf_counter() - start) * 1000 / pages
+
+        def fresh_fragments():
+            # includes the one-off compile cost on every page
+            fragments = FragmentRenderer()
+            return lambda: render_row_with_fragments(fragments)
+
+        warm = FragmentRenderer()
+
+        before = per_page(lambda: render_row_with_templates)
+        cold = per_page(fresh_fragments)
+        after = per_page(lambda: lambda: render_row_with_fragments(warm))
+
+        self.stdout.write(f"render_to_string:        {before:.3f}ms per page")
+        self.stdout.write(f"FragmentRenderer (cold): {cold:.3f}ms per page")
+        self.stdout.write(f"FragmentRenderer (warm): {after:.3f}ms per page")
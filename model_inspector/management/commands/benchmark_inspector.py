@@ -0,0 +1,77 @@
+import json
+import platform
+
+import django
+import wagtail
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases
+
+from model_inspector.benchmark import build_schema, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the Model Inspector listing against a synthetic schema of "
+        "dynamically created models in a throwaway test database, and write the "
+        "results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--models", type=int, default=400, help="Plain models to generate"
+        )
+        parser.add_argument(
+            "--page-types", type=int, default=200, help="Page types to generate"
+        )
+        parser.add_argument(
+            "--populated",
+            type=float,
+            default=0.5,
+            help="Fraction of generated tables that get a row (default: 0.5)",
+        )
+        parser.add_argument(
+            "--page-sizes",
+            default="50,100,250",
+            help="Comma separated listing page sizes (default: 50,100,250)",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Runs per measurement (median)"
+        )
+        parser.add_argument(
+            "--output", help="Write the results to this file instead of stdout"
+        )
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options["page_sizes"].split(",")]
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            models = build_schema(
+                options["models"], options["page_types"], options["populated"]
+            )
+            results = run_benchmark(models, page_sizes, options["repeat"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        report = json.dumps(
+            {
+                "environment": {
+                    "python": platform.python_version(),
+                    "django": django.get_version(),
+                    "wagtail": wagtail.__version__,
+                },
+                "schema": {
+                    "models": options["models"],
+                    "page_types": options["page_types"],
+                    "populated": options["populated"],
+                },
+                "results": results,
+            },
+            indent=2,
+        )
+
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                stream.write(report + "\n")
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,193 @@
+import json
+import os
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from model_inspector.history import record_run
+from model_inspector.sweeps import (
+    CheckPool,
+    get_default_host,
+    get_sweep_contenttypes,
+    get_targets,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the admin, frontend and listing URL of a sample instance of every "
+        "content type in-process, report the status and timing of each one and "
+        "save them as a check run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=["jsonl", "junit"],
+            default="jsonl",
+            help="Output format (default: jsonl)",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the report to this file instead of stdout",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes to render URLs with",
+        )
+        parser.add_argument(
+            "--user",
+            help="Username to render admin URLs as (default: the first superuser)",
+        )
+        parser.add_argument(
+            "--host",
+            help="Host header to send (default: the default Site's hostname)",
+        )
+        parser.add_argument(
+            "--include-excluded",
+            action="store_true",
+            help="Also check the models listed in MODEL_INSPECTOR_EXCLUDE",
+        )
+        parser.add_argument(
+            "--max-latency",
+            type=float,
+            help="Fail if any URL takes longer than this many milliseconds",
+        )
+        parser.add_argument(
+            "--changed-only",
+            action="store_true",
+            help=(
+                "Only check the models whose templates, migrations or sample "
+                "instance changed since they last passed"
+            ),
+        )
+        parser.add_argument(
+            "--no-record",
+            action="store_true",
+            help="Don't save the results as a check run",
+        )
+        parser.add_argument(
+            "--baseline",
+            action="store_true",
+            help="Mark the saved check run as the baseline for later runs",
+        )
+        parser.add_argument(
+            "--no-fail",
+            action="store_true",
+            help="Always exit successfully, even if URLs fail",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        user = self.get_user(options["user"])
+        host = options["host"] or get_default_host()
+
+        targets, unchanged = get_targets(
+            get_sweep_contenttypes(options["include_excluded"]),
+            options["changed_only"],
+        )
+        if options["changed_only"] and self.verbosity > 1:
+            self.stderr.write(f"Skipping {len(unchanged)} unchanged models")
+
+        with CheckPool(
+            user, host, workers=options["processes"], processes=True
+        ) as pool:
+            results = pool.check(url for _, _, url, _ in targets)
+
+        if not options["no_record"]:
+            record_run(
+                [
+                    {
+                        "content_type": contenttype.pk,
+                        "kind": kind,
+                        "fingerprint": fingerprint,
+                        **result,
+                    }
+                    for (contenttype, kind, _, fingerprint), result in zip(
+                        targets, results
+                    )
+                ],
+                user=user,
+                source="command",
+                is_baseline=options["baseline"],
+            )
+
+        records = [
+            {
+                "content_type": f"{contenttype.app_label}.{contenttype.model}",
+                "kind": kind,
+                **result,
+            }
+            for (contenttype, kind, _, _), result in zip(targets, results)
+        ]
+
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                self.write_report(stream, records, options)
+        else:
+            self.write_report(self.stdout, records, options)
+
+        failures = [r for r in records if self.is_failure(r, options["max_latency"])]
+        if failures and not options["no_fail"]:
+            raise CommandError(f"{len(failures)} of {len(records)} URLs failed")
+
+    def get_user(self, username):
+        User = get_user_model()
+        if username:
+            try:
+                return User.objects.get(**{User.USERNAME_FIELD: username})
+            except User.DoesNotExist:
+                raise CommandError(f"User '{username}' does not exist")
+        user = User.objects.filter(is_superuser=True).order_by("pk").first()
+        if user is None:
+            # anonymously every admin URL would redirect to the login page
+            raise CommandError("There is no superuser, pass --user to check as")
+        return user
+
+    def is_failure(self, record, max_latency):
+        if not record["ok"]:
+            return True
+        return max_latency is not None and record["latency_ms"] > max_latency
+
+    def write_report(self, stream, records, options):
+        if options["format"] == "junit":
+            self.write_junit(stream, records, options["max_latency"])
+        else:
+            for record in records:
+                stream.write(json.dumps(record) + "\n")
+
+    def write_junit(self, stream, records, max_latency):
+        failures = [r for r in records if self.is_failure(r, max_latency)]
+        suite = ElementTree.Element(
+            "testsuite",
+            name="inspect_models",
+            tests=str(len(records)),
+            failures=str(len(failures)),
+            time=f"{sum(r['latency_ms'] for r in records) / 1000:.3f}",
+        )
+        for record in records:
+            case = ElementTree.SubElement(
+                suite,
+                "testcase",
+                classname=record["content_type"],
+                name=f"{record['kind']} {record['url']}",
+                time=f"{record['latency_ms'] / 1000:.3f}",
+            )
+            if not record["ok"]:
+                failure = ElementTree.SubElement(
+                    case,
+                    "failure",
+                    message=record["exception"] or f"HTTP {record['status']}",
+                )
+                failure.text = json.dumps(record)
+            elif self.is_failure(record, max_latency):
+                ElementTree.SubElement(
+                    case,
+                    "failure",
+                    message=f"Took {record['latency_ms']}ms (max {max_latency}ms)",
+                )
+
+        stream.write(ElementTree.tostring(suite, encoding="unicode") + "\n")
@@ -0,0 +1,152 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from model_inspector.loadtest import LOAD_TEST_KINDS, get_corpus, run_load_test
+from model_inspector.sweeps import get_default_host
+
+# kinds of URL in the admin, which have to be requested as a staff user
+ADMIN_KINDS = {"admin", "listing"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the sample URLs of every content type and a set of searches "
+        "against the site, in-process or against a running server, and write "
+        "the latency percentiles, requests per second and queries per request "
+        "as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help=(
+                "Base URL of a running server, e.g. http://localhost:8000 "
+                "(default: request the URLs in-process)"
+            ),
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Number of requests to make, cycling through the URLs (default: 500)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Number of requests to make at once (default: 8)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=0,
+            help="Number of untimed requests to make first",
+        )
+        parser.add_argument(
+            "--kinds",
+            help=(
+                "Comma separated kinds of URL to request, of "
+                f"{', '.join(LOAD_TEST_KINDS)} (default: frontend,listing,search, "
+                "or frontend,search with --url, as those requests are anonymous)"
+            ),
+        )
+        parser.add_argument(
+            "--urls",
+            help="Replay the URLs in this file, one per line, instead",
+        )
+        parser.add_argument(
+            "--queries",
+            help=(
+                "Search for the queries in this file, one per line (default: the "
+                "popular queries of the last week, or the sample page titles)"
+            ),
+        )
+        parser.add_argument(
+            "--user",
+            help=(
+                "Username to make in-process requests as (default: the first "
+                "superuser when requesting admin or listing URLs, else anonymous)"
+            ),
+        )
+        parser.add_argument(
+            "--host",
+            help="Host header to send (default: the default Site's hostname)",
+        )
+        parser.add_argument(
+            "--include-excluded",
+            action="store_true",
+            help="Also request the models listed in MODEL_INSPECTOR_EXCLUDE",
+        )
+        parser.add_argument(
+            "--output", help="Write the results to this file instead of stdout"
+        )
+
+    def handle(self, *args, **options):
+        default_kinds = (
+            "frontend,search" if options["url"] else "frontend,listing,search"
+        )
+        kinds = [
+            kind.strip() for kind in (options["kinds"] or default_kinds).split(",")
+        ]
+        unknown = set(kinds) - set(LOAD_TEST_KINDS)
+        if unknown:
+            raise CommandError(f"Unknown kinds of URL: {', '.join(sorted(unknown))}")
+
+        if options["urls"]:
+            corpus = [("url", url) for url in self.read_lines(options["urls"])]
+        else:
+            queries = None
+            if options["queries"]:
+                queries = self.read_lines(options["queries"])
+            corpus = get_corpus(kinds, queries, options["include_excluded"])
+        if not corpus:
+            raise CommandError("There are no URLs to request")
+
+        results = run_load_test(
+            corpus,
+            options["requests"],
+            options["concurrency"],
+            base_url=options["url"],
+            user=self.get_user(options["user"], kinds),
+            host=options["host"] or get_default_host(),
+            warmup=options["warmup"],
+        )
+        report = json.dumps(
+            {
+                "target": options["url"] or "in-process",
+                "concurrency": options["concurrency"],
+                "urls": len(corpus),
+                **results,
+            },
+            indent=2,
+        )
+
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                stream.write(report + "\n")
+        else:
+            self.stdout.write(report)
+
+    def read_lines(self, path):
+        try:
+            with open(path) as f:
+                return [line.strip() for line in f if line.strip()]
+        except OSError as e:
+            raise CommandError(f"Can't read {path}: {e}")
+
+    def get_user(self, username, kinds):
+        User = get_user_model()
+        if username:
+            try:
+                return User.objects.get(**{User.USERNAME_FIELD: username})
+            except User.DoesNotExist:
+                raise CommandError(f"User '{username}' does not exist")
+        if not ADMIN_KINDS.intersection(kinds):
+            return None
+        user = User.objects.filter(is_superuser=True).order_by("pk").first()
+        if user is None:
+            # anonymously every admin URL would redirect to the login page
+            raise CommandError("There is no superuser, pass --user to request as")
+        return user
@@ -0,0 +1,86 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from model_inspector.checker import get_concurrency
+from model_inspector.sweeps import (
+    SWEEP_CHUNK_SIZE,
+    claim_next_job,
+    get_worker_name,
+    run_job,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the sweeps queued from the Model Inspector, checking every model "
+        "in chunks and saving the progress and results as it goes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pool",
+            choices=["thread", "process"],
+            default="thread",
+            help="Render URLs in a pool of threads or processes (default: thread)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help=(
+                "Number of threads or processes to render URLs with (default: "
+                "MODEL_INSPECTOR_CHECK_CONCURRENCY threads or one process per CPU)"
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=SWEEP_CHUNK_SIZE,
+            help="Number of models to check between progress updates",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2,
+            help="Seconds to wait before polling an empty queue again",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for more sweeps",
+        )
+
+    def handle(self, *args, **options):
+        processes = options["pool"] == "process"
+        workers = options["workers"] or (
+            os.cpu_count() or 1 if processes else get_concurrency()
+        )
+        worker = get_worker_name()
+
+        while True:
+            job = claim_next_job(worker)
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+
+            if options["verbosity"] > 1:
+                self.stderr.write(f"Running {job}")
+            try:
+                run_job(
+                    job,
+                    workers=workers,
+                    processes=processes,
+                    chunk_size=options["chunk_size"],
+                )
+            except Exception as e:
+                # the job is marked as failed, carry on with the next one
+                self.stderr.write(f"{job} failed: {e!r}")
+            else:
+                progress = job.get_progress()
+                self.stdout.write(
+                    f"{job}: checked {progress['checked']} URLs, "
+                    f"{progress['failed']} failed"
+                )
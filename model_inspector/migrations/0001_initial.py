@@ -0,0 +1,113 @@
+# Generated by Django 5.1.3 on 2026-10-18 01:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CheckRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[("admin", "Admin"), ("command", "Management command")],
+                        max_length=20,
+                    ),
+                ),
+                ("is_baseline", models.BooleanField(default=False)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at", "-pk"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CheckResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("admin", "Admin Page"),
+                            ("frontend", "Frontend Page"),
+                            ("listing", "Listing Page"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("url", models.TextField()),
+                ("status", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("ok", models.BooleanField()),
+                ("latency_ms", models.FloatField()),
+                ("queries", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "duplicate_queries",
+                    models.PositiveIntegerField(blank=True, null=True),
+                ),
+                ("exception", models.CharField(blank=True, max_length=255)),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="results",
+                        to="model_inspector.checkrun",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["run", "content_type"], name="model_inspe_run_ct_idx"
+                    )
+                ],
+            },
+        ),
+    ]
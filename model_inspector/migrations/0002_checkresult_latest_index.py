@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("model_inspector", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="checkresult",
+            index=models.Index(
+                fields=["content_type", "kind", "run"],
+                name="model_inspe_ct_kind_run_idx",
+            ),
+        ),
+    ]
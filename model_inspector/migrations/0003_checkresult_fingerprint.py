@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("model_inspector", "0002_checkresult_latest_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="checkresult",
+            name="fingerprint",
+            field=models.CharField(blank=True, max_length=40),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("model_inspector", "0004_sweepjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sweepjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,167 @@
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.urls import reverse
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy as _
+
+URL_KINDS = [
+    ("admin", _("Admin Page")),
+    ("frontend", _("Frontend Page")),
+    ("listing", _("Listing Page")),
+]
+
+
+class CheckRun(models.Model):
+    """
+    A batch of URL checks, from the inspect_models command or the "Run All"
+    action of the Model Inspector.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    source = models.CharField(
+        max_length=20,
+        choices=[("admin", _("Admin")), ("command", _("Management command"))],
+    )
+    is_baseline = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ["-created_at", "-pk"]
+
+    def __str__(self):
+        return f"Check run {self.pk} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class CheckResult(models.Model):
+    # the (run, content_type) index covers lookups on run alone
+    run = models.ForeignKey(
+        CheckRun, on_delete=models.CASCADE, related_name="results", db_index=False
+    )
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name="+"
+    )
+    kind = models.CharField(max_length=20, choices=URL_KINDS)
+    url = models.TextField()
+    status = models.PositiveSmallIntegerField(null=True, blank=True)
+    ok = models.BooleanField()
+    latency_ms = models.FloatField()
+    queries = models.PositiveIntegerField(null=True, blank=True)
+    duplicate_queries = models.PositiveIntegerField(null=True, blank=True)
+    exception = models.CharField(max_length=255, blank=True)
+    # see model_inspector.fingerprints
+    fingerprint = models.CharField(max_length=40, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["run", "content_type"],
+                name="model_inspe_run_ct_idx",
+            ),
+            # for finding the latest result of each url
+            models.Index(
+                fields=["content_type", "kind", "run"],
+                name="model_inspe_ct_kind_run_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.url}"
+
+
+SWEEP_STATUSES = [
+    ("pending", _("Pending")),
+    ("running", _("Running")),
+    ("done", _("Done")),
+    ("failed", _("Failed")),
+]
+
+
+# seconds a running sweep can go without a heartbeat before it is failed
+DEFAULT_SWEEP_TIMEOUT = 10 * 60
+
+
+def get_sweep_timeout():
+    return getattr(settings, "MODEL_INSPECTOR_SWEEP_TIMEOUT", DEFAULT_SWEEP_TIMEOUT)
+
+
+class SweepJob(models.Model):
+    """
+    A check of every model queued from the Model Inspector, run in the
+    background by the run_inspector_worker command. The worker saves the
+    results to ``run`` and its progress to the counters as it goes, and
+    updates ``heartbeat_at`` with each chunk so a job whose worker died can
+    be told apart from a slow one.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    changed_only = models.BooleanField(default=False)
+    status = models.CharField(
+        max_length=20, choices=SWEEP_STATUSES, default="pending", db_index=True
+    )
+    worker = models.CharField(max_length=255, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    checked = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    run = models.ForeignKey(
+        CheckRun, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-pk"]
+
+    def __str__(self):
+        return f"Sweep {self.pk} ({self.status})"
+
+    def is_stale(self):
+        if self.status != "running":
+            return False
+        heartbeat_at = self.heartbeat_at or self.started_at
+        return (now() - heartbeat_at).total_seconds() > get_sweep_timeout()
+
+    def get_progress(self):
+        """
+        Return the completion percentage, throughput and failures so far.
+        """
+        elapsed = 0
+        if self.started_at:
+            elapsed = ((self.finished_at or now()) - self.started_at).total_seconds()
+
+        if self.total:
+            percent = round(self.checked * 100 / self.total, 1)
+        else:
+            percent = 100.0 if self.status == "done" else 0.0
+
+        return {
+            "id": self.pk,
+            "status": self.status,
+            "total": self.total,
+            "checked": self.checked,
+            "failed": self.failed,
+            "percent": percent,
+            "urls_per_second": round(self.checked / elapsed, 2) if elapsed else 0,
+            "error": self.error,
+            "stale": self.is_stale(),
+            "run_url": (
+                reverse("model_inspector_check_run", args=[self.run_id])
+                if self.run_id
+                else None
+            ),
+        }
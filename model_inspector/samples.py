@@ -0,0 +1,433 @@
+import functools
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import IntegerField, Max, Min, Value
+from django.utils.module_loading import import_string
+from treebeard.mp_tree import MP_Node
+from wagtail.models.specific import SpecificMixin
+
+from model_inspector.finders import reads_instance_fields
+
+# Keep compound selects well below SQLite's default limit of 500 terms
+UNION_CHUNK_SIZE = 100
+
+# and the parameters of a query below the limit of older SQLite versions
+MAX_QUERY_PARAMS = 500
+
+INTEGER_PK_TYPES = {
+    "AutoField",
+    "BigAutoField",
+    "SmallAutoField",
+    "IntegerField",
+    "BigIntegerField",
+    "SmallIntegerField",
+    "PositiveIntegerField",
+    "PositiveBigIntegerField",
+    "PositiveSmallIntegerField",
+}
+
+
+def get_root_model(model):
+    model = model._meta.concrete_model
+    while model._meta.parents:
+        model = next(iter(model._meta.parents))
+    return model
+
+
+def is_polymorphic(model):
+    """
+    Polymorphic models (e.g. Page) store every subclass in the root table with
+    a content_type column, so one query can find samples for all subclasses.
+    """
+    try:
+        field = model._meta.get_field("content_type")
+    except FieldDoesNotExist:
+        return False
+    return (
+        issubclass(model, SpecificMixin)
+        and field.is_relation
+        and field.related_model is ContentType
+        and hasattr(model._default_manager.all(), "specific")
+    )
+
+
+def get_sample_filters(model):
+    """
+    Return the filters a sample of ``model`` has to match. Tree roots of
+    treebeard models (the root Page and Collection) have no useful URLs, so
+    those sample a non-root node.
+    """
+    if issubclass(model, MP_Node):
+        return {"depth__gt": 1}
+    return {}
+
+
+def get_sample_queryset(model, contenttype_id, db):
+    """
+    Return the rows of ``model`` a sample may be picked from. The table of a
+    polymorphic model also holds its subclasses, so only its own rows count.
+    """
+    queryset = model._default_manager.using(db).order_by()
+    if is_polymorphic(model):
+        queryset = queryset.filter(content_type_id=contenttype_id)
+    return queryset.filter(**get_sample_filters(model))
+
+
+def get_pk_type(model):
+    # models can only share a UNION when their pk columns are compatible
+    field = model._meta.pk
+    while field.is_relation:
+        field = field.target_field
+    internal_type = field.get_internal_type()
+    return "integer" if internal_type in INTEGER_PK_TYPES else internal_type
+
+
+class SamplingStrategy:
+    """
+    Base class for the ways of picking sample instances of a model.
+
+    ``get_sample_pks`` is called once with every model that uses the
+    strategy, as a list of ``(contenttype_id, model)``, so it can batch its
+    queries across models. It returns a dict of content type id -> a list of
+    sample pks, empty if there are none.
+
+    ``stable_on_insert`` says whether the first sample of a model stays the
+    same when rows are added to it, so the cached sample URLs only need
+    dropping when the sample row itself changes.
+    """
+
+    stable_on_insert = False
+
+    def __init__(self, count=1):
+        self.count = count
+
+    def get_sample_pks(self, models):
+        raise NotImplementedError
+
+
+class AggregateStrategy(SamplingStrategy):
+    """
+    Sample the lowest or highest pk of each model, or of each distinct value
+    of ``group_by`` for the models that have that field. Uses one GROUP BY
+    query per polymorphic root and UNION ALL queries for everything else.
+    """
+
+    aggregate = Min
+    group_by = None
+
+    @property
+    def stable_on_insert(self):
+        # new rows get higher pks, so the lowest one stays the first sample
+        return self.aggregate is Min
+
+    def get_group_by(self, model):
+        if self.group_by is None:
+            return []
+        try:
+            return [model._meta.get_field(self.group_by).attname]
+        except FieldDoesNotExist:
+            return []
+
+    def get_sample_pks(self, models):
+        polymorphic = defaultdict(list)
+        unions = defaultdict(list)
+        sample_pks = {contenttype_id: [] for contenttype_id, _ in models}
+
+        for contenttype_id, model in models:
+            root = get_root_model(model)
+            db = model._default_manager.db
+            if is_polymorphic(root):
+                polymorphic[(root, db)].append(contenttype_id)
+            else:
+                unions[(db, get_pk_type(model))].append((contenttype_id, model))
+
+        for (root, db), contenttype_ids in polymorphic.items():
+            rows = (
+                root._default_manager.using(db)
+                .order_by()
+                .filter(content_type_id__in=contenttype_ids, **get_sample_filters(root))
+                .values("content_type_id", *self.get_group_by(root))
+                .annotate(sample_pk=self.aggregate("pk"))
+                .values_list("content_type_id", "sample_pk")
+            )
+            for contenttype_id, pk in rows:
+                sample_pks[contenttype_id].append(pk)
+
+        for (db, _), chunk_models in unions.items():
+            for start in range(0, len(chunk_models), UNION_CHUNK_SIZE):
+                end = start + UNION_CHUNK_SIZE
+                chunk = chunk_models[start:end]
+                parts = [
+                    get_sample_queryset(model, contenttype_id, db)
+                    .annotate(contenttype_id=Value(contenttype_id, IntegerField()))
+                    .values("contenttype_id", *self.get_group_by(model))
+                    .annotate(sample_pk=self.aggregate("pk"))
+                    .values_list("contenttype_id", "sample_pk")
+                    for contenttype_id, model in chunk
+                ]
+                for contenttype_id, pk in parts[0].union(*parts[1:], all=True):
+                    # an empty table still aggregates to a NULL row
+                    if pk is not None:
+                        sample_pks[contenttype_id].append(pk)
+
+        for pks in sample_pks.values():
+            pks.sort()
+        return sample_pks
+
+
+class FirstStrategy(AggregateStrategy):
+    aggregate = Min
+
+
+class LatestStrategy(AggregateStrategy):
+    aggregate = Max
+
+
+class LiveAndDraftStrategy(AggregateStrategy):
+    # one live and one draft instance of pages and other DraftStateMixin models
+    group_by = "live"
+
+
+class PerLocaleStrategy(AggregateStrategy):
+    # one instance per locale of pages and other TranslatableMixin models
+    group_by = "locale"
+
+
+class RandomStrategy(SamplingStrategy):
+    """
+    Sample up to ``count`` random instances of each model without ORDER BY
+    RANDOM(): pick random pks between each model's lowest and highest pk and
+    keep the ones that exist. That is one UNION ALL query for the pk ranges
+    and one for the candidates, whatever the number of models. Models with
+    non-integer pks, or where no candidate hits, fall back to their lowest pk.
+    """
+
+    # candidates per requested sample, to make up for gaps in the pks
+    oversample = 4
+
+    def __init__(self, count=5):
+        super().__init__(count)
+
+    def get_sample_pks(self, models):
+        integer_models = []
+        other_models = []
+        for contenttype_id, model in models:
+            if get_pk_type(model) == "integer":
+                integer_models.append((contenttype_id, model))
+            else:
+                other_models.append((contenttype_id, model))
+
+        sample_pks = FirstStrategy().get_sample_pks(other_models)
+        ranges = self.get_pk_ranges(integer_models)
+
+        candidates = {}
+        for contenttype_id, (low, high) in ranges.items():
+            size = high - low + 1
+            candidates[contenttype_id] = random.sample(
+                range(low, high + 1), min(size, self.count * self.oversample)
+            )
+
+        found = defaultdict(list)
+        chunk_size = max(1, MAX_QUERY_PARAMS // (self.count * self.oversample))
+        for db, chunk in self.iter_chunks(
+            [m for m in integer_models if m[0] in candidates], chunk_size
+        ):
+            parts = [
+                get_sample_queryset(model, contenttype_id, db)
+                .filter(pk__in=candidates[contenttype_id])
+                .annotate(contenttype_id=Value(contenttype_id, IntegerField()))
+                .values_list("contenttype_id", "pk")
+                for contenttype_id, model in chunk
+            ]
+            for contenttype_id, pk in parts[0].union(*parts[1:], all=True):
+                found[contenttype_id].append(pk)
+
+        for contenttype_id, _ in integer_models:
+            if contenttype_id not in ranges:
+                sample_pks[contenttype_id] = []
+            elif found[contenttype_id]:
+                random.shuffle(found[contenttype_id])
+                sample_pks[contenttype_id] = sorted(found[contenttype_id][: self.count])
+            else:
+                sample_pks[contenttype_id] = [ranges[contenttype_id][0]]
+        return sample_pks
+
+    def iter_chunks(self, models, chunk_size):
+        by_db = defaultdict(list)
+        for contenttype_id, model in models:
+            by_db[model._default_manager.db].append((contenttype_id, model))
+        for db, db_models in by_db.items():
+            for start in range(0, len(db_models), chunk_size):
+                end = start + chunk_size
+                yield db, db_models[start:end]
+
+    def get_pk_ranges(self, models):
+        ranges = {}
+        for db, chunk in self.iter_chunks(models, UNION_CHUNK_SIZE):
+            parts = [
+                get_sample_queryset(model, contenttype_id, db)
+                .annotate(contenttype_id=Value(contenttype_id, IntegerField()))
+                .values("contenttype_id")
+                .annotate(low=Min("pk"), high=Max("pk"))
+                .values_list("contenttype_id", "low", "high")
+                for contenttype_id, model in chunk
+            ]
+            for contenttype_id, low, high in parts[0].union(*parts[1:], all=True):
+                if low is not None:
+                    ranges[contenttype_id] = (low, high)
+        return ranges
+
+
+SAMPLING_STRATEGIES = {
+    "first": FirstStrategy,
+    "latest": LatestStrategy,
+    "random": RandomStrategy,
+    "live_and_draft": LiveAndDraftStrategy,
+    "per_locale": PerLocaleStrategy,
+}
+
+
+@functools.cache
+def get_strategy(spec):
+    """
+    Return the strategy for a MODEL_INSPECTOR_SAMPLING value: the name of a
+    built in strategy or the dotted path to a SamplingStrategy subclass,
+    optionally in a ``(strategy, count)`` tuple.
+    """
+    name, *args = spec if isinstance(spec, (tuple, list)) else [spec]
+    if name in SAMPLING_STRATEGIES:
+        strategy_class = SAMPLING_STRATEGIES[name]
+    else:
+        try:
+            strategy_class = import_string(name)
+        except ImportError:
+            raise ImproperlyConfigured(
+                f"MODEL_INSPECTOR_SAMPLING: unknown sampling strategy '{name}'"
+            )
+    return strategy_class(*args)
+
+
+def get_strategy_spec(model):
+    """
+    Look up the strategy for ``model`` in MODEL_INSPECTOR_SAMPLING, a dict
+    keyed by ``(app_label, model)``, where model may be ``"*"`` for a whole
+    app. Models not listed use ``"first"``.
+    """
+    sampling = getattr(settings, "MODEL_INSPECTOR_SAMPLING", None) or {}
+    opts = model._meta
+    spec = sampling.get(
+        (opts.app_label, opts.model_name), sampling.get((opts.app_label, "*"))
+    )
+    if isinstance(spec, list):
+        spec = tuple(spec)
+    return spec or "first"
+
+
+def get_samples(contenttypes):
+    """
+    Return a dict of content type id -> a list of sample pks of that model,
+    with the models grouped by sampling strategy so each strategy batches its
+    queries.
+    """
+    models_by_strategy = defaultdict(list)
+    samples = {}
+
+    for contenttype in contenttypes:
+        model = contenttype.model_class()
+        samples[contenttype.pk] = []
+        if model is None:
+            continue
+        strategy = get_strategy(get_strategy_spec(model))
+        models_by_strategy[strategy].append((contenttype.pk, model))
+
+    for strategy, models in models_by_strategy.items():
+        samples.update(strategy.get_sample_pks(models))
+
+    return samples
+
+
+def get_sample_pks(contenttypes):
+    """
+    Return a dict of content type id -> the first sample pk of that model (or
+    None if the table is empty).
+    """
+    return {
+        contenttype_id: pks[0] if pks else None
+        for contenttype_id, pks in get_samples(contenttypes).items()
+    }
+
+
+def get_sample_instance_lists(contenttypes):
+    """
+    Return a dict of content type id -> a list of sample instances of that
+    model, picked by its sampling strategy.
+
+    Polymorphic models are fetched in one query per root with
+    ``.specific(defer=True)``. Instances of models whose URLs only need the
+    pk are built from it without a query, with their other fields deferred;
+    the rest are fetched in one ``in_bulk`` query per model, see
+    ``reads_instance_fields``.
+    """
+    contenttypes = list(contenttypes)
+    samples = get_samples(contenttypes)
+
+    instances = {}
+    polymorphic = defaultdict(list)
+    plain = defaultdict(list)
+
+    for contenttype in contenttypes:
+        pks = samples[contenttype.pk]
+        instances[contenttype.pk] = []
+        if not pks:
+            continue
+
+        model = contenttype.model_class()
+        root = get_root_model(model)
+        db = model._default_manager.db
+        if is_polymorphic(root):
+            polymorphic[(root, db)].append((contenttype.pk, pks))
+        elif reads_instance_fields(model):
+            plain[(model, db)].append((contenttype.pk, pks))
+        else:
+            attname = model._meta.pk.attname
+            instances[contenttype.pk] = [
+                model.from_db(db, [attname], [pk]) for pk in pks
+            ]
+
+    for (model, db), model_samples in plain.items():
+        fetched = model._default_manager.using(db).in_bulk(
+            [pk for _, pks in model_samples for pk in pks]
+        )
+        for contenttype_id, pks in model_samples:
+            instances[contenttype_id] = [fetched[pk] for pk in pks if pk in fetched]
+
+    for (root, db), root_samples in polymorphic.items():
+        fetched = {
+            obj.pk: obj
+            for obj in root._default_manager.using(db)
+            .filter(pk__in=[pk for _, pks in root_samples for pk in pks])
+            .specific(defer=True)
+        }
+        for contenttype_id, pks in root_samples:
+            instances[contenttype_id] = [fetched[pk] for pk in pks if pk in fetched]
+
+    return instances
+
+
+def get_sample_instances(contenttypes):
+    """
+    Return a dict of content type id -> the first sample instance of that
+    model, or None if there isn't one. See ``get_sample_instance_lists``.
+    """
+    return {
+        contenttype_id: samples[0] if samples else None
+        for contenttype_id, samples in get_sample_instance_lists(contenttypes).items()
+    }
+
+
+def get_sample_instance(contenttype):
+    return get_sample_instances([contenttype])[contenttype.pk]
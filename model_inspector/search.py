@@ -0,0 +1,169 @@
+"""
+An in-memory search index of the installed models, so the Model Inspector
+can find models by their names, fields, related models and admin viewsets
+without scanning the content types table.
+"""
+
+import bisect
+import itertools
+import re
+import threading
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils.text import camel_case_to_spaces
+from wagtail.admin.viewsets import viewsets
+from wagtail.admin.viewsets.model import ModelViewSet
+
+# what a word was indexed from; ``facet:term`` only matches that facet
+FACETS = ["model", "app", "field", "related", "viewset"]
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+TERM_RE = re.compile(r"[^a-z0-9_]")
+
+
+def get_words(values):
+    """
+    Return the lower case words of ``values`` (names, verbose names or class
+    names). Identifiers are also kept whole, so ``BlogCategory`` is indexed
+    as ``blogcategory``, ``blog`` and ``category``.
+    """
+    words = set()
+    for value in values:
+        value = str(value)
+        if " " not in value:
+            words.add(value.lower())
+        words.update(WORD_RE.findall(camel_case_to_spaces(value)))
+    return words
+
+
+def get_trigrams(word):
+    return {"".join(chars) for chars in zip(word, word[1:], word[2:])}
+
+
+def get_viewset_names():
+    names = defaultdict(list)
+    for viewset in viewsets.viewsets:
+        if isinstance(viewset, ModelViewSet):
+            names[viewset.model] += [viewset.name, type(viewset).__name__]
+    return names
+
+
+def get_model_terms(contenttype, viewset_names):
+    """
+    Return a dict of facet -> the values to index ``contenttype`` under.
+    Stale content types only have their app label and model name.
+    """
+    terms = {"model": [contenttype.model], "app": [contenttype.app_label]}
+    model = contenttype.model_class()
+    if model is None:
+        return terms
+
+    opts = model._meta
+    fields = [*opts.fields, *opts.many_to_many, *opts.private_fields]
+    terms["model"] += [opts.object_name, opts.verbose_name, opts.verbose_name_plural]
+    terms["app"].append(opts.app_config.verbose_name)
+    terms["field"] = [field.name for field in fields]
+    terms["related"] = [
+        value
+        for field in fields
+        if field.related_model is not None and not isinstance(field.related_model, str)
+        for value in [
+            field.related_model._meta.object_name,
+            field.related_model._meta.verbose_name,
+        ]
+    ]
+    terms["viewset"] = viewset_names.get(model, [])
+    return terms
+
+
+class ModelSearchIndex:
+    """
+    Maps the words of each content type's model and app names, field names,
+    related models and registered admin viewset to the content type ids.
+
+    A search term matches the indexed words that contain it, found through a
+    trigram index, or that start with it if it is shorter than a trigram. The
+    index is built on first use and cleared on migrate.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = None
+
+    def clear(self):
+        self.data = None
+
+    def get_data(self):
+        data = self.data
+        if data is None:
+            with self.lock:
+                if self.data is None:
+                    self.data = self.build()
+                data = self.data
+        return data
+
+    def build(self):
+        # word -> facet -> content type ids
+        postings = defaultdict(lambda: defaultdict(set))
+        viewset_names = get_viewset_names()
+        for contenttype in ContentType.objects.all():
+            for facet, values in get_model_terms(contenttype, viewset_names).items():
+                for word in get_words(values):
+                    postings[word][facet].add(contenttype.pk)
+
+        words = sorted(postings)
+        trigrams = defaultdict(set)
+        for word in words:
+            for trigram in get_trigrams(word):
+                trigrams[trigram].add(word)
+        return dict(postings), words, dict(trigrams)
+
+    def match_words(self, term):
+        _postings, words, trigrams = self.get_data()
+        if len(term) < 3:
+            start = bisect.bisect_left(words, term)
+            return list(
+                itertools.takewhile(
+                    lambda word: word.startswith(term),
+                    itertools.islice(words, start, None),
+                )
+            )
+
+        candidates = None
+        for trigram in get_trigrams(term):
+            found = trigrams.get(trigram, set())
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                return []
+        # sharing every trigram doesn't make it a substring
+        return [word for word in candidates if term in word]
+
+    def search(self, query):
+        """
+        Return the set of ids of the content types matching every term of
+        ``query``. Terms may be limited to one facet, e.g.
+        ``field:slug related:blogcategory``.
+        """
+        postings = self.get_data()[0]
+        ids = None
+        for term in query.lower().split():
+            facet, _, term = term.rpartition(":")
+            term = TERM_RE.sub("", term)
+            if not term:
+                continue
+
+            term_ids = set()
+            for word in self.match_words(term):
+                for word_facet, contenttype_ids in postings[word].items():
+                    if facet in FACETS and word_facet != facet:
+                        continue
+                    term_ids |= contenttype_ids
+
+            ids = term_ids if ids is None else ids & term_ids
+            if not ids:
+                break
+        return ids or set()
+
+
+search_index = ModelSearchIndex()
@@ -0,0 +1,76 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_migrate, post_save
+from wagtail.models import Site
+
+from model_inspector.cache import (
+    invalidate_filter_choices,
+    invalidate_page_samples,
+    invalidate_sample,
+)
+from model_inspector.search import search_index
+
+# the inspector's own models, sessions and append-only logs are written on
+# nearly every request, so their saves don't look up the cached sample. A log's
+# sample only goes stale if its row is deleted, and sessions have no URLs.
+UNTRACKED_APPS = {"model_inspector"}
+UNTRACKED_MODELS = {
+    "sessions.session",
+    "admin.logentry",
+    "wagtailcore.revision",
+    "wagtailcore.pagelogentry",
+    "wagtailcore.modellogentry",
+    "wagtailsearch.indexentry",
+}
+
+
+def is_tracked(model):
+    opts = model._meta
+    return (
+        opts.app_label not in UNTRACKED_APPS
+        and opts.label_lower not in UNTRACKED_MODELS
+    )
+
+
+def invalidate(sender, instance, created=False):
+    if sender is ContentType:
+        invalidate_filter_choices()
+        search_index.clear()
+    elif sender is Site:
+        invalidate_page_samples()
+    if is_tracked(sender):
+        invalidate_sample(sender, instance.pk, created)
+
+
+def post_save_invalidate_sample(sender, instance, created, raw=False, **kwargs):
+    # fixtures are loaded with raw saves, before anything is cached
+    if not raw:
+        invalidate(sender, instance, created)
+
+
+def post_delete_invalidate_sample(sender, instance, **kwargs):
+    invalidate(sender, instance)
+
+
+def post_migrate_invalidate_filter_choices(sender, **kwargs):
+    # content types are created and removed by migrate
+    from model_inspector.views import get_excluded_contenttype_ids
+
+    invalidate_filter_choices()
+    get_excluded_contenttype_ids.cache_clear()
+    search_index.clear()
+
+
+def setting_changed_invalidate_exclude(sender, setting, **kwargs):
+    if setting == "MODEL_INSPECTOR_EXCLUDE":
+        from model_inspector.views import get_excluded_contenttype_ids
+
+        invalidate_filter_choices()
+        get_excluded_contenttype_ids.cache_clear()
+
+
+def register_signal_handlers():
+    post_save.connect(post_save_invalidate_sample)
+    post_delete.connect(post_delete_invalidate_sample)
+    post_migrate.connect(post_migrate_invalidate_filter_choices)
+    setting_changed.connect(setting_changed_invalidate_exclude)
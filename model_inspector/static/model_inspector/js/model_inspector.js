@@ -1,31 +1,205 @@
 /**
- * Add a button to the actions column header to run all checks in the column
+ * Create a link that checks every row in the table, or only the rows of the
+ * models that changed since they last passed
  */
-document.addEventListener("DOMContentLoaded", function () {
+function createRunLink(id, text, changedOnly) {
+  const link = document.createElement("a");
+  link.href = "#";
+  link.id = id;
+  link.textContent = text;
+
+  link.addEventListener("click", function (event) {
+    event.preventDefault();
+    const checkButtons = document.querySelectorAll("button[data-check-action]");
+
+    if (!checkButtons.length) {
+      return;
+    }
+
+    // a full sweep is saved as a check run, for the check history
+    checkRows(
+      Array.from(checkButtons).map((button) => button.closest("tr")),
+      checkButtons[0].dataset.checkUrl,
+      true,
+      changedOnly
+    );
+  });
+
+  return link;
+}
+
+/**
+ * Add buttons to the actions column header to run all checks in the column
+ */
+function addRunAllLink() {
   const actionsColumnHeaderCell = document.querySelector("th.check-actions");
 
-  if (!actionsColumnHeaderCell) {
+  if (!actionsColumnHeaderCell || document.getElementById("run-all-checks")) {
     return;
   }
 
-  /**
-   * Manipluate the Actions text to a a link ro run all checks in this column
-   * by running the click event on the buttons
-   */
-  const actionsLink = document.createElement("a");
-  actionsLink.href = "#";
-  actionsLink.id = "run-all-checks";
-  actionsLink.textContent = "(Run All)";
+  actionsColumnHeaderCell.appendChild(
+    createRunLink("run-all-checks", "(Run All)", false)
+  );
+  actionsColumnHeaderCell.appendChild(document.createTextNode(" "));
+  actionsColumnHeaderCell.appendChild(
+    createRunLink("run-changed-checks", "(Run Changed)", true)
+  );
+}
 
-  actionsLink.addEventListener("click", function (event) {
-    event.preventDefault();
-    const checkButtons = document.querySelectorAll("button[data-check-action]");
-    checkButtons.forEach((button) => {
-      button.click();
+/**
+ * In progressive mode the url cells are rendered as placeholders, fill them
+ * in with batched requests so a slow model only delays its own batch
+ */
+const PENDING_BATCH_SIZE = 10;
+
+function loadPendingUrls() {
+  const placeholders = document.querySelectorAll(
+    "[data-model-inspector-pending]"
+  );
+
+  if (!placeholders.length) {
+    return;
+  }
+
+  const urlsUrl = placeholders[0].dataset.urlsUrl;
+  const ids = [
+    ...new Set(
+      Array.from(placeholders).map((element) => element.dataset.contentTypeId)
+    ),
+  ];
+
+  for (let i = 0; i < ids.length; i += PENDING_BATCH_SIZE) {
+    const params = new URLSearchParams();
+    ids.slice(i, i + PENDING_BATCH_SIZE).forEach((id) => params.append("id", id));
+
+    fetch(`${urlsUrl}?${params}`)
+      .then((response) => response.json())
+      .then((data) => {
+        Object.entries(data.results).forEach(([id, cells]) => {
+          document
+            .querySelectorAll(`[data-model-inspector-pending][data-content-type-id="${id}"]`)
+            .forEach((element) => {
+              element.outerHTML = cells[element.dataset.modelInspectorPending].html;
+            });
+        });
+      });
+  }
+}
+
+/**
+ * Queue a sweep of every model, or of the ones that changed since they last
+ * passed, for the background worker and poll its progress until it is done,
+ * its worker stopped responding, or polling timed out
+ */
+const SWEEP_POLL_INTERVAL = 2000;
+const SWEEP_POLL_TIMEOUT = 60 * 60 * 1000;
+
+function showSweepProgress(status, progress) {
+  let text = `Sweep ${progress.status}: ${progress.percent}% of ${progress.total} URLs, ${progress.urls_per_second} URLs/s, ${progress.failed} failed`;
+  if (progress.error) {
+    text += ` (${progress.error})`;
+  }
+  if (progress.stale) {
+    text += " (the worker stopped responding)";
+  }
+  status.textContent = text;
+
+  if (progress.run_url && progress.status === "done") {
+    const link = document.createElement("a");
+    link.href = progress.run_url;
+    link.textContent = "View results";
+    status.appendChild(document.createTextNode(" "));
+    status.appendChild(link);
+  }
+}
+
+function pollSweep(status, progressUrl, startedAt) {
+  fetch(progressUrl)
+    .then((response) => response.json())
+    .then((progress) => {
+      showSweepProgress(status, progress);
+      if (
+        (progress.status !== "pending" && progress.status !== "running") ||
+        progress.stale
+      ) {
+        return;
+      }
+      if (Date.now() - startedAt > SWEEP_POLL_TIMEOUT) {
+        status.appendChild(
+          document.createTextNode(
+            " (stopped polling, is run_inspector_worker running?)"
+          )
+        );
+        return;
+      }
+      setTimeout(
+        () => pollSweep(status, progressUrl, startedAt),
+        SWEEP_POLL_INTERVAL
+      );
     });
-  });
+}
+
+function startSweep(event) {
+  const button = event.target.closest("[data-model-inspector-sweep]");
+
+  if (!button) {
+    return;
+  }
+  event.preventDefault();
+
+  const config = JSON.parse(
+    document.getElementById("wagtail-config").textContent
+  );
+  let status = document.getElementById("model-inspector-sweep-status");
+  if (!status) {
+    status = document.createElement("p");
+    status.id = "model-inspector-sweep-status";
+    const results = document.getElementById("listing-results");
+    if (results) {
+      results.parentNode.insertBefore(status, results);
+    } else {
+      button.after(status);
+    }
+  }
+  status.textContent = "Queueing sweep...";
+
+  fetch(button.getAttribute("href"), {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      [config.CSRF_HEADER_NAME]: config.CSRF_TOKEN,
+    },
+    body: JSON.stringify({
+      changed_only: button.dataset.modelInspectorSweep === "changed",
+    }),
+  })
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.json();
+    })
+    .then((progress) => {
+      showSweepProgress(status, progress);
+      pollSweep(status, progress.progress_url, Date.now());
+    })
+    .catch((error) => {
+      status.textContent = `Sweep could not be queued: ${error.message}`;
+    });
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+  addRunAllLink();
+  loadPendingUrls();
+});
 
-  actionsColumnHeaderCell.appendChild(actionsLink);
+document.addEventListener("click", startSweep);
+
+// The listing results are replaced when filtering, sorting or paginating
+document.addEventListener("w-swap:success", function () {
+  addRunAllLink();
+  loadPendingUrls();
 });
 
 /**
@@ -52,78 +226,184 @@ function copyToClipboard(button) {
 }
 
 /**
- * Check the responses of the view buttons in the row
+ * Send a batch of urls to the server side checker, which renders them
+ * in-process and returns the status and latency of each one
  */
-function checkResponses(button) {
-  const row = button.closest("tr");
+function postChecks(checkUrl, urls, targets, changedOnly) {
+  const config = JSON.parse(
+    document.getElementById("wagtail-config").textContent
+  );
+
+  return fetch(checkUrl, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      [config.CSRF_HEADER_NAME]: config.CSRF_TOKEN,
+    },
+    body: JSON.stringify(
+      targets
+        ? { urls: urls, targets: targets, changed_only: changedOnly }
+        : { urls: urls }
+    ),
+  })
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.json();
+    })
+    .then((data) => data.results);
+}
+
+/**
+ * The url cells of a row, in column order
+ */
+const CHECK_KINDS = ["admin", "frontend", "listing"];
+
+/**
+ * Format the metrics returned by the checker for the metric columns
+ */
+const METRICS = {
+  queries: (result) => result.queries,
+  duplicate_queries: (result) => result.duplicate_queries,
+  sql_time: (result) => `${result.sql_ms}ms`,
+  template_time: (result) => `${result.template_ms}ms`,
+  response_size: (result) =>
+    result.size === null ? "-" : `${(result.size / 1024).toFixed(1)}KB`,
+};
+
+/**
+ * Reset the view buttons and metrics in the row and return the urls to check
+ */
+function getRowChecks(row) {
   row.classList.remove("serious");
   const cells = row.querySelectorAll("td");
+  const contentTypeId = parseInt(
+    row.querySelector("button[data-check-action]").dataset.contentTypeId,
+    10
+  );
+  const checks = [];
 
-  const adminButton = cells[1].querySelector("a");
-  const frontendButton = cells[2].querySelector("a");
-  const listingButton = cells[3].querySelector("a");
+  row.querySelectorAll("[data-model-inspector-metric]").forEach((element) => {
+    element.innerHTML = "&ndash;";
+  });
 
-  let adminUrl;
-  let frontUrl;
-  let listingUrl;
+  // the frontend cell has a link per site and locale the page is on
+  [cells[1], cells[2], cells[3]].forEach((cell, index) => {
+    cell.querySelectorAll("a").forEach((button) => {
+      button.classList.remove("button-primary");
+      button.classList.remove("serious");
+      button.classList.add("button-secondary");
+      button.removeAttribute("title");
+      checks.push({
+        url: button.getAttribute("href"),
+        button: button,
+        row: row,
+        contentTypeId: contentTypeId,
+        kind: CHECK_KINDS[index],
+      });
+    });
+  });
 
-  if (!adminButton && !frontendButton && !listingButton) {
+  return checks;
+}
+
+function markFailed(button, title) {
+  button.classList.add("serious");
+  button.classList.remove("button-secondary");
+  button.closest("tr").classList.add("serious");
+  if (title) {
+    button.title = title;
+  }
+}
+
+/**
+ * Show the metrics of every checked url in the row, one line per url
+ */
+function applyMetrics(row, results) {
+  row.querySelectorAll("[data-model-inspector-metric]").forEach((element) => {
+    const format = METRICS[element.dataset.modelInspectorMetric];
+    const lines = results.map(
+      ({ check, result }) =>
+        `${check.kind}: ${result.skipped ? "unchanged" : format(result)}`
+    );
+
+    element.innerHTML = "";
+    lines.forEach((line, index) => {
+      if (index) {
+        element.appendChild(document.createElement("br"));
+      }
+      element.appendChild(document.createTextNode(line));
+    });
+  });
+}
+
+function applyResult(check, result) {
+  if (result.skipped) {
+    check.button.title = "Unchanged since it last passed";
     return;
   }
 
-  if (adminButton) {
-    adminButton.classList.remove("button-primary");
-    adminButton.classList.remove("serious");
-    adminButton.classList.add("button-secondary");
-    adminUrl = adminButton.href;
+  let title = `${result.exception || result.status} (${result.latency_ms}ms)`;
+  if (result.redirects && result.redirects.length) {
+    title += ` after redirecting to ${result.redirects[result.redirects.length - 1]}`;
   }
 
-  if (frontendButton) {
-    frontendButton.classList.remove("button-primary");
-    frontendButton.classList.remove("serious");
-    frontendButton.classList.add("button-secondary");
-    frontUrl = frontendButton.href;
+  if (result.ok) {
+    check.button.classList.add("button-primary");
+    check.button.classList.remove("button-secondary");
+    check.button.title = title;
+  } else {
+    markFailed(check.button, title);
   }
+}
 
-  if (listingButton) {
-    listingButton.classList.remove("button-primary");
-    listingButton.classList.remove("serious");
-    listingButton.classList.add("button-secondary");
-    listingUrl = listingButton.href;
+/**
+ * Check the responses of the view buttons in all the given rows with a
+ * single request to the server, optionally saving them as a check run and
+ * skipping the models that haven't changed since they last passed
+ */
+function checkRows(rows, checkUrl, record, changedOnly) {
+  const checks = rows.flatMap(getRowChecks);
+
+  if (!checks.length) {
+    return;
   }
 
-  const checks = [
-    {
-      url: adminUrl,
-      button: adminButton,
-    },
-    {
-      url: frontUrl,
-      button: frontendButton,
-    },
-    {
-      url: listingUrl,
-      button: listingButton,
-    },
-  ];
+  postChecks(
+    checkUrl,
+    checks.map((check) => check.url),
+    record
+      ? checks.map((check) => ({
+          content_type: check.contentTypeId,
+          kind: check.kind,
+        }))
+      : null,
+    Boolean(changedOnly)
+  )
+    .then((results) => {
+      const resultsByRow = new Map();
 
-  checks.forEach((check) => {
-    if (check.url) {
-      fetch(check.url)
-        .then((response) => {
-          if (response.ok) {
-            check.button.classList.add("button-primary");
-            check.button.classList.remove("button-secondary");
-          } else {
-            check.button.classList.add("serious");
-            check.button.classList.remove("button-secondary");
-            check.button.closest("tr").classList.add("serious");
-          }
-        })
-        .catch((error) => {
-          check.button.classList.add("serious");
-          check.button.classList.remove("button-secondary");
-        });
-    }
-  });
+      results.forEach((result, index) => {
+        const check = checks[index];
+        applyResult(check, result);
+
+        if (!resultsByRow.has(check.row)) {
+          resultsByRow.set(check.row, []);
+        }
+        resultsByRow.get(check.row).push({ check: check, result: result });
+      });
+
+      resultsByRow.forEach((rowResults, row) => applyMetrics(row, rowResults));
+    })
+    .catch((error) => {
+      checks.forEach((check) => markFailed(check.button, error.message));
+    });
+}
+
+/**
+ * Check the responses of the view buttons in the row
+ */
+function checkResponses(button) {
+  checkRows([button.closest("tr")], button.dataset.checkUrl);
 }
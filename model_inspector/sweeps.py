@@ -0,0 +1,256 @@
+"""
+Check every model's sample URLs in one go: from the inspect_models command,
+or as a SweepJob queued from the Model Inspector and run by the
+run_inspector_worker command.
+"""
+
+import datetime
+import os
+import socket
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.timezone import now
+from wagtail.models import Page, Site
+
+from model_inspector.checker import URLChecker
+from model_inspector.finders import get_frontend_url_matrix, get_instance_urls
+from model_inspector.fingerprints import get_fingerprints
+from model_inspector.history import add_results, get_unchanged_contenttype_ids
+from model_inspector.models import CheckRun, SweepJob, get_sweep_timeout
+from model_inspector.samples import get_sample_instance_lists
+from model_inspector.views import filter_exclude_queryset
+
+# content types checked, saved and reported between progress updates
+SWEEP_CHUNK_SIZE = 20
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def _check_chunk(urls, user_pk, host):
+    user = get_user_model().objects.get(pk=user_pk) if user_pk else None
+    return URLChecker(user=user, host=host, concurrency=1).check(urls)
+
+
+def get_default_host():
+    site = Site.objects.filter(is_default_site=True).first()
+    return site.hostname if site else None
+
+
+def get_sweep_contenttypes(include_excluded=False):
+    qs = ContentType.objects.order_by("app_label", "model")
+    if not include_excluded:
+        qs = filter_exclude_queryset(qs)
+    return [ct for ct in qs if ct.model_class() is not None]
+
+
+def get_sample_urls(contenttypes, samples):
+    """
+    Return a list of ``(contenttype, kind, url)`` for the URLs of the sample
+    instances in ``samples``, see ``get_sample_instance_lists``.
+    """
+    matrix = get_frontend_url_matrix(
+        [instance for instances in samples.values() for instance in instances]
+    )
+
+    sample_urls = []
+    for contenttype in contenttypes:
+        # every sample shares the listing url, so only check it once
+        seen = set()
+        for instance in samples[contenttype.pk] or [None]:
+            urls = get_instance_urls(instance)
+            # pages are checked on every site and locale they're on
+            frontend_urls = [urls["frontend"]]
+            if isinstance(instance, Page) and matrix[instance.pk]:
+                frontend_urls = [entry["url"] for entry in matrix[instance.pk]]
+
+            for kind, url in [
+                ("admin", urls["admin"]),
+                *(("frontend", url) for url in frontend_urls),
+                ("listing", urls["listing"]),
+            ]:
+                if url and url not in seen:
+                    seen.add(url)
+                    sample_urls.append((contenttype, kind, url))
+    return sample_urls
+
+
+def get_targets(contenttypes, changed_only=False):
+    """
+    Return a list of ``(contenttype, kind, url, fingerprint)`` for the sample
+    URLs of ``contenttypes``, and the set of ids of the unchanged content
+    types left out if ``changed_only`` is set.
+    """
+    samples = get_sample_instance_lists(contenttypes)
+    fingerprints = get_fingerprints(
+        contenttypes,
+        {pk: instances[0] if instances else None for pk, instances in samples.items()},
+    )
+
+    unchanged = set()
+    if changed_only:
+        unchanged = get_unchanged_contenttype_ids(fingerprints)
+
+    targets = [
+        (contenttype, kind, url, fingerprints[contenttype.pk])
+        for contenttype, kind, url in get_sample_urls(
+            [ct for ct in contenttypes if ct.pk not in unchanged], samples
+        )
+    ]
+    return targets, unchanged
+
+
+class CheckPool:
+    """
+    Check batches of URLs across ``workers`` threads, or worker processes
+    with ``processes=True``. Use as a context manager, so the processes are
+    started once for every batch.
+    """
+
+    def __init__(self, user=None, host=None, workers=1, processes=False):
+        self.user = user
+        self.host = host
+        self.workers = max(1, workers)
+        self.processes = processes
+        self.executor = None
+
+    def __enter__(self):
+        if self.processes and self.workers > 1:
+            # forked workers must not share the parent's database connections
+            connections.close_all()
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def check(self, urls):
+        urls = list(urls)
+        if self.executor is None or len(urls) <= 1:
+            checker = URLChecker(
+                user=self.user,
+                host=self.host,
+                concurrency=1 if self.processes else self.workers,
+            )
+            return checker.check(urls)
+
+        workers = min(self.workers, len(urls))
+        user_pk = self.user.pk if self.user else None
+        chunks = [urls[i::workers] for i in range(workers)]
+        chunk_results = list(
+            self.executor.map(
+                _check_chunk, chunks, [user_pk] * workers, [self.host] * workers
+            )
+        )
+
+        results = [None] * len(urls)
+        for i, chunk_result in enumerate(chunk_results):
+            results[i::workers] = chunk_result
+        return results
+
+
+def get_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def fail_stale_jobs():
+    """
+    Mark the running SweepJobs that haven't had a heartbeat for
+    MODEL_INSPECTOR_SWEEP_TIMEOUT seconds as failed, their worker died.
+    """
+    cutoff = now() - datetime.timedelta(seconds=get_sweep_timeout())
+    return SweepJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at=None, started_at__lt=cutoff),
+        status="running",
+    ).update(
+        status="failed",
+        error="The worker stopped updating the sweep",
+        finished_at=now(),
+    )
+
+
+def claim_next_job(worker=None):
+    """
+    Fail the stale SweepJobs, then mark the oldest pending one as running
+    and return it, or None if the queue is empty. Several workers can poll
+    the same queue: the job is only claimed if its status is still pending
+    when the update runs.
+    """
+    worker = worker or get_worker_name()
+    fail_stale_jobs()
+    for job in SweepJob.objects.filter(status="pending").order_by("created_at", "pk"):
+        claimed = SweepJob.objects.filter(pk=job.pk, status="pending").update(
+            status="running", worker=worker, started_at=now(), heartbeat_at=now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_job(job, workers=1, processes=False, chunk_size=SWEEP_CHUNK_SIZE):
+    """
+    Check the sample URLs of every model for ``job``, ``chunk_size`` content
+    types at a time. The results of each chunk are saved to the job's check
+    run, and its counters and heartbeat updated, before the next chunk
+    starts. Stops early if the job was failed as stale in the meantime.
+    """
+    # a job failed as stale stays failed
+    jobs = SweepJob.objects.filter(pk=job.pk, status="running")
+    try:
+        targets, _unchanged = get_targets(get_sweep_contenttypes(), job.changed_only)
+        run = CheckRun.objects.create(user=job.user, source="admin")
+        jobs.update(total=len(targets), run=run, heartbeat_at=now())
+
+        targets_by_contenttype = defaultdict(list)
+        for target in targets:
+            targets_by_contenttype[target[0].pk].append(target)
+        groups = list(targets_by_contenttype.values())
+
+        with CheckPool(
+            job.user, get_default_host(), workers=workers, processes=processes
+        ) as pool:
+            for start in range(0, len(groups), chunk_size):
+                end = start + chunk_size
+                chunk = [target for group in groups[start:end] for target in group]
+                results = pool.check(url for _, _, url, _ in chunk)
+                add_results(
+                    run,
+                    [
+                        {
+                            "content_type": contenttype.pk,
+                            "kind": kind,
+                            "fingerprint": fingerprint,
+                            **result,
+                        }
+                        for (contenttype, kind, _, fingerprint), result in zip(
+                            chunk, results
+                        )
+                    ],
+                )
+                updated = jobs.update(
+                    checked=F("checked") + len(results),
+                    failed=F("failed") + sum(not result["ok"] for result in results),
+                    heartbeat_at=now(),
+                )
+                if not updated:
+                    break
+    except Exception as e:
+        jobs.update(status="failed", error=repr(e), finished_at=now())
+        raise
+    else:
+        jobs.update(status="done", finished_at=now())
+    finally:
+        job.refresh_from_db()
@@ -1,3 +1,958 @@
-from django.test import TestCase
+import csv
+import datetime
+import json
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.template.base import Template
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from wagtail import hooks
+from wagtail.models import Collection, GroupApprovalTask, Locale, Page, Site
+
+from app.blog.models import BlogCategory, BlogPage
+from app.home.models import HomePage
+from app.search.analytics import hit_buffer
+from model_inspector.cache import get_cache_key, get_sample_urls
+from model_inspector.checker import TemplateTimer, URLChecker
+from model_inspector.checks import check_sample_cache
+from model_inspector.finders import (
+    ListingURLRegistry,
+    get_frontend_url_matrix,
+    listing_urls,
+)
+from model_inspector.fingerprints import get_fingerprints, get_template_paths
+from model_inspector.fragments import FragmentRenderer
+from model_inspector.history import (
+    compare_runs,
+    get_baseline,
+    get_latest_results,
+    get_unchanged_contenttype_ids,
+    record_run,
+)
+from model_inspector.loadtest import get_corpus, percentile
+from model_inspector.models import CheckResult, CheckRun, SweepJob
+from model_inspector.samples import get_sample_instances, get_samples
+from model_inspector.search import search_index
+from model_inspector.sweeps import claim_next_job
+from model_inspector.views import filter_exclude_queryset, get_filter_choices
+
+
+class ModelInspectorTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        # checks and load tests search, don't flush earlier tests' hits
+        hit_buffer.clear()
+        self.user = User.objects.create_user(
+            username="testuser", password="12345", is_staff=True, is_superuser=True
+        )
+        self.client.login(username="testuser", password="12345")
+
+
+class IndexViewTestCase(ModelInspectorTestCase):
+    def test_index_view(self):
+        response = self.client.get(reverse("model_inspector_index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Model Inspector")
+
+    def test_index_results_view(self):
+        response = self.client.get(reverse("model_inspector_index_results"))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(MODEL_INSPECTOR_PROGRESSIVE=True)
+    def test_progressive_index_view(self):
+        response = self.client.get(reverse("model_inspector_index"))
+        self.assertContains(response, 'data-model-inspector-pending="admin"')
+        self.assertNotContains(response, ">View</a>")
+
+    def test_index_view_metric_columns(self):
+        response = self.client.get(reverse("model_inspector_index"))
+        self.assertContains(response, "Duplicate Queries")
+        self.assertContains(response, 'data-model-inspector-metric="sql_time"')
+
+    def test_csv_export(self):
+        response = self.client.get(
+            reverse("model_inspector_index"), {"export": "csv", "app_label": "auth"}
+        )
+        self.assertTrue(response.streaming)
+        rows = list(
+            csv.reader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        group = Group.objects.order_by("pk").first()
+
+        self.assertEqual(rows[0][:3], ["App label", "Model", "Admin Page"])
+        self.assertIn(
+            ["auth", "group", f"/admin/groups/edit/{group.pk}/", ""],
+            [row[:4] for row in rows],
+        )
+
+    @override_settings(MODEL_INSPECTOR_EXCLUDE=[("home", "homepage")])
+    def test_jsonl_export(self):
+        group_ct = ContentType.objects.get_for_model(Group)
+        self.client.post(
+            reverse("model_inspector_check"),
+            json.dumps(
+                {
+                    "urls": ["/does-not-exist/"],
+                    "targets": [{"content_type": group_ct.pk, "kind": "admin"}],
+                }
+            ),
+            content_type="application/json",
+        )
+
+        with mock.patch("model_inspector.views.EXPORT_CHUNK_SIZE", 3), mock.patch(
+            "model_inspector.views.IndexView.get_context_data"
+        ) as get_context_data:
+            response = self.client.get(
+                reverse("model_inspector_index"), {"export": "jsonl", "exclude": "true"}
+            )
+            records = [
+                json.loads(line)
+                for line in b"".join(response.streaming_content).splitlines()
+            ]
+        by_model = {(r["app_label"], r["model"]): r for r in records}
+
+        # the queryset is only read by the stream
+        get_context_data.assert_not_called()
+        self.assertEqual(len(records), filter_exclude_queryset().count())
+        self.assertNotIn(("home", "homepage"), by_model)
+        self.assertEqual(by_model[("auth", "group")]["admin_status"], 404)
+        self.assertIsNone(by_model[("auth", "group")]["frontend_status"])
+
+    def test_urls_view(self):
+        group_ct = ContentType.objects.get_for_model(Group)
+        category_ct = ContentType.objects.get_for_model(BlogCategory)
+        response = self.client.get(
+            reverse("model_inspector_urls"), {"id": [group_ct.pk, category_ct.pk]}
+        )
+        results = response.json()["results"]
+        group = Group.objects.order_by("pk").first()
+
+        self.assertEqual(
+            results[str(group_ct.pk)]["admin"]["url"], f"/admin/groups/edit/{group.pk}/"
+        )
+        self.assertIn(">View</a>", results[str(group_ct.pk)]["admin"]["html"])
+        self.assertIsNone(results[str(category_ct.pk)]["admin"]["url"])
+
+    async def test_urls_view_async(self):
+        await self.async_client.aforce_login(self.user)
+        group_ct = await ContentType.objects.aget(app_label="auth", model="group")
+        response = await self.async_client.get(
+            reverse("model_inspector_urls"), {"id": group_ct.pk}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(str(group_ct.pk), response.json()["results"])
+
+    def test_urls_view_requires_admin_access(self):
+        self.client.logout()
+        response = self.client.get(reverse("model_inspector_urls"), {"id": 1})
+        self.assertEqual(response.status_code, 403)
+
+    def test_urls_view_bad_request(self):
+        response = self.client.get(reverse("model_inspector_urls"), {"id": "x"})
+        self.assertEqual(response.status_code, 400)
+
+
+class URLCheckerTestCase(ModelInspectorTestCase):
+    def test_check_urls(self):
+        home_page = HomePage.objects.first()
+        checker = URLChecker(user=self.user, concurrency=1)
+        results = checker.check(
+            [f"/admin/pages/{home_page.pk}/edit/", "/search/", "/does-not-exist/"]
+        )
+
+        self.assertEqual([r["status"] for r in results], [200, 200, 404])
+        self.assertEqual([r["ok"] for r in results], [True, True, False])
+        self.assertIsNone(results[0]["exception"])
+        self.assertGreater(results[0]["latency_ms"], 0)
+
+    def test_check_urls_follows_redirects(self):
+        results = URLChecker(concurrency=1).check(["/search", "/admin/pages/"])
+
+        self.assertEqual([r["status"] for r in results], [200, 200])
+        self.assertEqual(results[0]["redirects"], ["/search/"])
+        self.assertTrue(results[0]["ok"])
+        # anonymous, so the admin redirects to the login page
+        self.assertTrue(results[1]["redirects"][-1].startswith("/admin/login/"))
+        self.assertFalse(results[1]["ok"])
+
+    def test_check_urls_shares_one_session(self):
+        home_page = HomePage.objects.first()
+        self.user.refresh_from_db()
+        last_login = self.user.last_login
+        sessions = Session.objects.count()
+
+        checker = URLChecker(user=self.user, concurrency=1)
+        for _ in range(2):
+            results = checker.check([f"/admin/pages/{home_page.pk}/edit/", "/admin/"])
+            self.assertTrue(all(r["ok"] for r in results))
+
+        self.assertEqual(Session.objects.count(), sessions)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, last_login)
+
+    def test_check_urls_metrics(self):
+        home_page = HomePage.objects.first()
+        checker = URLChecker(user=self.user, concurrency=1)
+        result = checker.check([f"/admin/pages/{home_page.pk}/edit/"])[0]
+
+        self.assertGreater(result["queries"], 0)
+        self.assertGreaterEqual(result["queries"], result["duplicate_queries"])
+        self.assertGreaterEqual(result["sql_ms"], 0)
+        self.assertGreater(result["template_ms"], 0)
+        self.assertGreater(result["size"], 0)
+
+    def test_template_timer_is_scoped_to_the_probe(self):
+        original = Template.render
+        with TemplateTimer():
+            self.assertIsNot(Template.render, original)
+        self.assertIs(Template.render, original)
+
+    def test_check_urls_threaded_keeps_order(self):
+        urls = ["/search/", "/search/?query=", "/does-not-exist/", "/search/"]
+        results = URLChecker(concurrency=3).check(urls)
+
+        self.assertEqual([r["url"] for r in results], urls)
+        self.assertEqual([r["status"] for r in results], [200, 200, 404, 200])
+
+    def test_acheck_keeps_order(self):
+        urls = ["/search/", "/does-not-exist/", "/search/?query=", "/search/"]
+        results = async_to_sync(URLChecker(concurrency=2).acheck)(urls)
+
+        self.assertEqual([r["url"] for r in results], urls)
+        self.assertEqual([r["status"] for r in results], [200, 404, 200, 200])
+
+    def test_check_view(self):
+        response = self.client.post(
+            reverse("model_inspector_check"),
+            json.dumps({"urls": ["/search/"]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["status"], 200)
+
+    def test_check_view_bad_request(self):
+        response = self.client.post(
+            reverse("model_inspector_check"),
+            json.dumps({"urls": "/search/"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class CheckRunTestCase(ModelInspectorTestCase):
+    def record(self, latency_ms, queries, ok=True, **kwargs):
+        group_ct = ContentType.objects.get_for_model(Group)
+        return record_run(
+            [
+                {
+                    "content_type": group_ct.pk,
+                    "kind": "admin",
+                    "url": "/admin/groups/edit/1/",
+                    "status": 200 if ok else 500,
+                    "ok": ok,
+                    "latency_ms": latency_ms,
+                    "exception": None,
+                    "queries": queries,
+                    "duplicate_queries": 0,
+                }
+            ],
+            **kwargs,
+        )
+
+    def test_compare_runs(self):
+        baseline = self.record(10, 5, is_baseline=True)
+        self.record(100, 50)
+        run = self.record(12, 12)
+
+        self.assertEqual(get_baseline(run), baseline)
+        [row] = compare_runs(run, baseline)
+        self.assertFalse(row["latency_regressed"])
+        self.assertTrue(row["queries_regressed"])
+        self.assertTrue(row["regressed"])
+
+        [row] = compare_runs(self.record(100, 5, ok=False), baseline)
+        self.assertTrue(row["failed"])
+        self.assertTrue(row["latency_regressed"])
+
+    def test_compare_runs_ignores_jitter_on_fast_urls(self):
+        baseline = self.record(0.4, 5, is_baseline=True)
+        [row] = compare_runs(self.record(0.7, 5), baseline)
+        self.assertFalse(row["latency_regressed"])
+
+        [row] = compare_runs(self.record(0.7, 5), baseline, latency_min_delta_ms=0)
+        self.assertTrue(row["latency_regressed"])
+
+    def test_check_view_records_run(self):
+        group_ct = ContentType.objects.get_for_model(Group)
+        response = self.client.post(
+            reverse("model_inspector_check"),
+            json.dumps(
+                {
+                    "urls": ["/search/"],
+                    "targets": [{"content_type": group_ct.pk, "kind": "frontend"}],
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        result = CheckResult.objects.get()
+        self.assertEqual(result.run.user, self.user)
+        self.assertEqual(result.content_type, group_ct)
+        self.assertEqual(result.status, 200)
+
+    def test_check_run_view(self):
+        self.record(10, 5)
+        self.record(10, 50)
+        response = self.client.get(reverse("model_inspector_check_runs"))
+        self.assertContains(response, "1 URL regressed")
+
+    def test_check_run_view_empty(self):
+        response = self.client.get(reverse("model_inspector_check_runs"))
+        self.assertContains(response, "No checks have been recorded yet")
+
+
+class InspectModelsCommandTestCase(ModelInspectorTestCase):
+    def call_command(self, *args):
+        out = StringIO()
+        call_command("inspect_models", "--processes=1", *args, stdout=out)
+        return out.getvalue()
+
+    def test_requires_a_user(self):
+        User.objects.filter(is_superuser=True).update(is_superuser=False)
+        with self.assertRaisesMessage(CommandError, "There is no superuser"):
+            self.call_command("--no-fail")
+
+    @override_settings(MODEL_INSPECTOR_EXCLUDE=[("home", "homepage")])
+    def test_jsonl_report(self):
+        records = [
+            json.loads(line) for line in self.call_command("--no-fail").splitlines()
+        ]
+        content_types = {r["content_type"] for r in records}
+
+        self.assertIn("auth.user", content_types)
+        self.assertNotIn("home.homepage", content_types)
+        for record in records:
+            self.assertEqual(
+                set(record),
+                {
+                    "content_type",
+                    "kind",
+                    "url",
+                    "status",
+                    "ok",
+                    "latency_ms",
+                    "exception",
+                    "redirects",
+                    "queries",
+                    "duplicate_queries",
+                    "sql_ms",
+                    "template_ms",
+                    "size",
+                },
+            )
+
+    @override_settings(MODEL_INSPECTOR_EXCLUDE=[("home", "homepage")])
+    def test_junit_report(self):
+        report = self.call_command("--format=junit", "--no-fail")
+        self.assertTrue(report.startswith('<testsuite name="inspect_models"'))
+        self.assertIn('classname="auth.user"', report)
+
+    @override_settings(MODEL_INSPECTOR_EXCLUDE=[("home", "homepage")])
+    def test_max_latency_fails(self):
+        with self.assertRaises(CommandError):
+            self.call_command("--max-latency=0")
+
+    def test_records_run(self):
+        records = self.call_command("--no-fail", "--baseline").splitlines()
+        run = CheckRun.objects.get()
+
+        self.assertEqual(run.source, "command")
+        self.assertTrue(run.is_baseline)
+        self.assertEqual(run.results.count(), len(records))
+
+    def test_changed_only(self):
+        records = [
+            json.loads(line) for line in self.call_command("--no-fail").splitlines()
+        ]
+        rechecked = [
+            json.loads(line)
+            for line in self.call_command("--no-fail", "--changed-only").splitlines()
+        ]
+        failed = {r["content_type"] for r in records if not r["ok"]}
+
+        self.assertLess(len(rechecked), len(records))
+        self.assertEqual({r["content_type"] for r in rechecked}, failed)
+
+    def test_no_record(self):
+        self.call_command("--no-fail", "--no-record")
+        self.assertFalse(CheckRun.objects.exists())
+
+
+class SweepJobTestCase(ModelInspectorTestCase):
+    def run_worker(self):
+        out = StringIO()
+        call_command(
+            "run_inspector_worker",
+            "--once",
+            "--workers=1",
+            "--chunk-size=5",
+            stdout=out,
+        )
+        return out.getvalue()
+
+    @override_settings(MODEL_INSPECTOR_EXCLUDE=[("home", "homepage")])
+    def test_sweep(self):
+        response = self.client.post(
+            reverse("model_inspector_sweeps"), "{}", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 201)
+        progress_url = response.json()["progress_url"]
+        self.assertEqual(self.client.get(progress_url).json()["status"], "pending")
+
+        self.run_worker()
+
+        progress = self.client.get(progress_url).json()
+        job = SweepJob.objects.get()
+        self.assertEqual(progress["status"], "done")
+        self.assertEqual(progress["percent"], 100.0)
+        self.assertGreater(progress["total"], 0)
+        self.assertEqual(progress["checked"], job.run.results.count())
+        self.assertEqual(progress["failed"], job.run.results.filter(ok=False).count())
+        self.assertEqual(job.run.user, self.user)
+        self.assertFalse(
+            job.run.results.filter(
+                content_type=ContentType.objects.get_for_model(HomePage)
+            ).exists()
+        )
+
+    def test_jobs_are_claimed_once(self):
+        SweepJob.objects.create()
+        job = claim_next_job("worker-1")
+        self.assertEqual(job.status, "running")
+        self.assertEqual(job.worker, "worker-1")
+        self.assertIsNone(claim_next_job("worker-2"))
+
+    @override_settings(MODEL_INSPECTOR_SWEEP_TIMEOUT=60)
+    def test_stale_jobs_are_failed(self):
+        long_ago = timezone.now() - datetime.timedelta(minutes=5)
+        stale = SweepJob.objects.create(
+            status="running", started_at=long_ago, heartbeat_at=long_ago
+        )
+        self.assertTrue(stale.get_progress()["stale"])
+        alive = SweepJob.objects.create(
+            status="running", started_at=long_ago, heartbeat_at=timezone.now()
+        )
+
+        self.assertIsNone(claim_next_job("worker-1"))
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(stale.status, "failed")
+        self.assertEqual(alive.status, "running")
+        self.assertFalse(alive.get_progress()["stale"])
+
+    def test_failed_job(self):
+        job = SweepJob.objects.create()
+        with mock.patch(
+            "model_inspector.sweeps.get_targets", side_effect=RuntimeError("boom")
+        ):
+            self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertIn("boom", job.get_progress()["error"])
+
+
+class LoadTestCommandTestCase(ModelInspectorTestCase):
+    def call_command(self, *args):
+        out = StringIO()
+        call_command("load_test", "--concurrency=1", *args, stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_report(self):
+        report = self.call_command("--requests=6")
+
+        self.assertEqual(report["requests"], 6)
+        self.assertEqual(set(report["kinds"]), {"frontend", "listing", "search"})
+        self.assertEqual(report["kinds"]["listing"]["errors"], 0)
+        self.assertGreater(report["queries_per_request"], 0)
+        self.assertLessEqual(report["latency_ms"]["p50"], report["latency_ms"]["p99"])
+
+    def test_corpus_is_seeded_from_samples(self):
+        with mock.patch("model_inspector.sweeps.get_fingerprints") as fingerprints:
+            corpus = get_corpus(["frontend", "search"])
+        fingerprints.assert_not_called()
+        homepage = HomePage.objects.get()
+
+        self.assertIn(("frontend", homepage.get_full_url()), corpus)
+        self.assertIn(("search", f"/search/?query={homepage.title}"), corpus)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+
+class SampleInstancesTestCase(ModelInspectorTestCase):
+    def test_samples(self):
+        Collection.get_first_root_node().add_child(name="Child")
+        models = [User, Group, Page, HomePage, Collection, BlogCategory]
+        contenttypes = [ContentType.objects.get_for_model(m) for m in models]
+
+        instances = get_sample_instances(contenttypes)
+        samples = [instances[ct.pk] for ct in contenttypes]
+
+        self.assertEqual(samples[0].pk, self.user.pk)
+        self.assertEqual(samples[1].pk, Group.objects.order_by("pk").first().pk)
+        self.assertIsNone(samples[2])
+        self.assertIsInstance(samples[3], HomePage)
+        self.assertEqual(samples[4].name, "Child")
+        self.assertIsNone(samples[5])
+
+    @override_settings(MODEL_INSPECTOR_SAMPLING={("wagtailcore", "*"): "random"})
+    def test_tree_roots_are_not_sampled(self):
+        root = Page.get_first_root_node()
+        page = root.add_child(instance=Page(title="Plain page"))
+        Collection.get_first_root_node().add_child(name="Child")
+        contenttypes = [
+            ContentType.objects.get_for_model(m) for m in [Page, Collection]
+        ]
+
+        # pk ranges, candidates and the specific page, the collection only
+        # needs its pk
+        with self.assertNumQueries(3):
+            instances = get_sample_instances(contenttypes)
+
+        self.assertEqual(instances[contenttypes[0].pk].pk, page.pk)
+        self.assertEqual(instances[contenttypes[1].pk].name, "Child")
+
+    def test_query_count_is_independent_of_content_types(self):
+        BlogCategory.objects.create(name="News", slug="news")
+        contenttypes = [
+            ContentType.objects.get_for_model(m) for m in [User, Group, BlogCategory]
+        ]
+        # the pks of every model, the instances are built from them
+        with self.assertNumQueries(1):
+            get_sample_instances(contenttypes[:1])
+        with self.assertNumQueries(1):
+            instances = get_sample_instances(contenttypes)
+        self.assertEqual(instances[contenttypes[2].pk].slug, "news")
+
+    def test_instances_are_fetched_when_urls_read_fields(self):
+        BlogCategory.objects.create(name="News", slug="news")
+        contenttype = ContentType.objects.get_for_model(BlogCategory)
+
+        with mock.patch.object(
+            listing_urls, "get_url", return_value=lambda instance: instance.slug
+        ):
+            with self.assertNumQueries(2):
+                instances = get_sample_instances([contenttype])
+        with self.assertNumQueries(0):
+            self.assertEqual(instances[contenttype.pk].slug, "news")
+
+
+class SamplingStrategyTestCase(ModelInspectorTestCase):
+    def get_samples(self, *models):
+        contenttypes = [ContentType.objects.get_for_model(m) for m in models]
+        samples = get_samples(contenttypes)
+        return [samples[ct.pk] for ct in contenttypes]
+
+    @override_settings(MODEL_INSPECTOR_SAMPLING={("auth", "*"): "latest"})
+    def test_latest(self):
+        self.assertEqual(
+            self.get_samples(Group),
+            [[Group.objects.order_by("pk").last().pk]],
+        )
+
+    @override_settings(MODEL_INSPECTOR_SAMPLING={("auth", "group"): ("random", 2)})
+    def test_random(self):
+        for i in range(5):
+            Group.objects.create(name=f"Group {i}")
+        [pks] = self.get_samples(Group)
+
+        self.assertEqual(len(pks), 2)
+        self.assertEqual(Group.objects.filter(pk__in=pks).count(), 2)
+
+    @override_settings(
+        MODEL_INSPECTOR_SAMPLING={
+            ("auth", "*"): ("random", 3),
+            ("blog", "blogcategory"): ("random", 3),
+        }
+    )
+    def test_random_is_batched(self):
+        contenttypes = [
+            ContentType.objects.get_for_model(m) for m in [User, Group, BlogCategory]
+        ]
+        with self.assertNumQueries(2):
+            samples = get_samples(contenttypes)
+        self.assertEqual(samples[contenttypes[2].pk], [])
+
+    @override_settings(
+        MODEL_INSPECTOR_SAMPLING={("wagtailcore", "page"): "live_and_draft"}
+    )
+    def test_live_and_draft(self):
+        root = Page.get_first_root_node()
+        live = root.add_child(instance=Page(title="Live"))
+        draft = root.add_child(instance=Page(title="Draft", live=False))
+
+        self.assertEqual(self.get_samples(Page), [[live.pk, draft.pk]])
+
+    @override_settings(MODEL_INSPECTOR_SAMPLING={("wagtailcore", "page"): "per_locale"})
+    def test_per_locale(self):
+        root = Page.get_first_root_node()
+        english = root.add_child(instance=Page(title="Home"))
+        french = root.add_child(
+            instance=Page(
+                title="Accueil", locale=Locale.objects.create(language_code="fr")
+            )
+        )
+
+        self.assertEqual(self.get_samples(Page), [[english.pk, french.pk]])
+
+    @override_settings(MODEL_INSPECTOR_SAMPLING={("auth", "group"): "nope"})
+    def test_unknown_strategy(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.get_samples(Group)
+
+
+class FingerprintTestCase(ModelInspectorTestCase):
+    def test_template_paths_follow_extends(self):
+        paths = get_template_paths("blog/blog_page.html")
+        self.assertTrue(paths[0].endswith("blog/blog_page.html"))
+        self.assertTrue(any(path.endswith("templates/base.html") for path in paths))
+
+    def test_fingerprint_changes_with_revision(self):
+        homepage_ct = ContentType.objects.get_for_model(HomePage)
+        group_ct = ContentType.objects.get_for_model(Group)
+        before = get_fingerprints([homepage_ct, group_ct])
+        self.assertEqual(before, get_fingerprints([homepage_ct, group_ct]))
+
+        HomePage.objects.order_by("pk").first().save_revision().publish()
+        after = get_fingerprints([homepage_ct, group_ct])
+
+        self.assertNotEqual(before[homepage_ct.pk], after[homepage_ct.pk])
+        self.assertEqual(before[group_ct.pk], after[group_ct.pk])
+
+    def test_unchanged_contenttype_ids(self):
+        group_ct = ContentType.objects.get_for_model(Group)
+        user_ct = ContentType.objects.get_for_model(User)
+        fingerprints = get_fingerprints([group_ct, user_ct])
+        result = {"status": 200, "ok": True, "latency_ms": 1, "exception": None}
+        record_run(
+            [
+                {
+                    "content_type": group_ct.pk,
+                    "kind": "admin",
+                    "url": "/admin/groups/",
+                    "fingerprint": fingerprints[group_ct.pk],
+                    **result,
+                },
+                {
+                    "content_type": user_ct.pk,
+                    "kind": "admin",
+                    "url": "/admin/users/",
+                    "fingerprint": "stale",
+                    **result,
+                },
+            ]
+        )
+
+        self.assertEqual(get_unchanged_contenttype_ids(fingerprints), {group_ct.pk})
+
+    def test_latest_results(self):
+        group_ct = ContentType.objects.get_for_model(Group)
+        user_ct = ContentType.objects.get_for_model(User)
+
+        def record(content_type, kind, status):
+            return {
+                "content_type": content_type.pk,
+                "kind": kind,
+                "url": "/",
+                "status": status,
+                "ok": status == 200,
+                "latency_ms": 1,
+                "exception": None,
+            }
+
+        record_run([record(group_ct, "admin", 500), record(user_ct, "admin", 404)])
+        record_run([record(group_ct, "admin", 200)])
+        record_run([record(user_ct, "frontend", 200)])
+
+        with self.assertNumQueries(2):
+            results = get_latest_results([group_ct.pk, user_ct.pk])
+        self.assertEqual(
+            {key: result.status for key, result in results.items()},
+            {
+                (group_ct.pk, "admin"): 200,
+                (user_ct.pk, "admin"): 404,
+                (user_ct.pk, "frontend"): 200,
+            },
+        )
+
+    def test_check_view_changed_only(self):
+        group_ct = ContentType.objects.get_for_model(Group)
+        body = {
+            "urls": ["/search/"],
+            "targets": [{"content_type": group_ct.pk, "kind": "frontend"}],
+            "changed_only": True,
+        }
+
+        for skipped in [None, True]:
+            response = self.client.post(
+                reverse("model_inspector_check"),
+                json.dumps(body),
+                content_type="application/json",
+            )
+            self.assertEqual(response.json()["results"][0].get("skipped"), skipped)
+
+        self.assertEqual(CheckResult.objects.count(), 1)
+
+
+class FrontendURLMatrixTestCase(ModelInspectorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.home_page = HomePage.objects.order_by("pk").first()
+        Site.objects.create(
+            hostname="other.example", port=443, root_page=self.home_page
+        )
+
+    def test_matrix_covers_every_site(self):
+        with self.assertNumQueries(1):
+            # just the site root paths, which Wagtail caches
+            matrix = get_frontend_url_matrix([self.home_page])
+
+        self.assertEqual(
+            [entry["url"] for entry in matrix[self.home_page.pk]],
+            ["http://localhost/", "https://other.example/"],
+        )
+        self.assertEqual(matrix[self.home_page.pk][1]["label"], "other.example")
+
+    @override_settings(WAGTAIL_I18N_ENABLED=True)
+    def test_matrix_covers_translations(self):
+        self.home_page.copy_for_translation(Locale.objects.create(language_code="fr"))
+        matrix = get_frontend_url_matrix([self.home_page])
+
+        self.assertEqual(
+            [entry["label"] for entry in matrix[self.home_page.pk]],
+            [
+                "localhost (en-gb)",
+                "other.example (en-gb)",
+                "localhost (fr)",
+                "other.example (fr)",
+            ],
+        )
+
+    def test_index_view_links_every_site(self):
+        response = self.client.get(
+            reverse("model_inspector_index"), {"app_label": "home"}
+        )
+        self.assertContains(response, 'href="https://other.example/"')
+
+
+class SampleCacheTestCase(ModelInspectorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.group_ct = ContentType.objects.get_for_model(Group)
+        self.category_ct = ContentType.objects.get_for_model(BlogCategory)
+        self.group_key = get_cache_key("auth", "group")
+        self.category_key = get_cache_key("blog", "blogcategory")
+
+    def test_cached_urls(self):
+        urls = get_sample_urls([self.group_ct, self.category_ct])
+        group = Group.objects.order_by("pk").first()
+
+        self.assertEqual(urls[self.group_ct.pk]["pk"], group.pk)
+        self.assertEqual(
+            urls[self.group_ct.pk]["admin"], f"/admin/groups/edit/{group.pk}/"
+        )
+        self.assertIsNone(urls[self.category_ct.pk]["pk"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_sample_urls([self.group_ct, self.category_ct]), urls)
+
+    def test_invalidated_when_table_becomes_non_empty(self):
+        get_sample_urls([self.category_ct])
+        BlogCategory.objects.create(name="News", slug="news")
+        self.assertIsNone(cache.get(self.category_key))
+
+    def test_invalidated_when_sample_deleted(self):
+        get_sample_urls([self.group_ct])
+        Group.objects.create(name="Other")
+        self.assertIsNotNone(cache.get(self.group_key))
+
+        Group.objects.order_by("pk").first().delete()
+        self.assertIsNone(cache.get(self.group_key))
+
+    @override_settings(MODEL_INSPECTOR_SAMPLING={("auth", "group"): "latest"})
+    def test_invalidated_when_strategy_may_pick_new_row(self):
+        get_sample_urls([self.group_ct])
+        Group.objects.order_by("pk").first().save()
+        self.assertIsNotNone(cache.get(self.group_key))
+
+        Group.objects.create(name="Other")
+        self.assertIsNone(cache.get(self.group_key))
+
+    def test_untracked_models_skip_the_cache(self):
+        with mock.patch("model_inspector.signal_handlers.invalidate_sample") as m:
+            CheckRun.objects.create(source="command")
+            BlogCategory(name="News", slug="news").save_base(raw=True)
+        m.assert_not_called()
+
+    @override_settings(
+        DEBUG=False,
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        },
+    )
+    def test_per_process_cache_warning(self):
+        self.assertEqual(
+            [warning.id for warning in check_sample_cache(None)],
+            ["model_inspector.W001"],
+        )
+        with self.settings(DEBUG=True):
+            self.assertEqual(check_sample_cache(None), [])
+
+
+class FragmentRendererTestCase(TestCase):
+    def test_matches_templates(self):
+        fragments = FragmentRenderer()
+        url = '/admin/?q="<b>"&x={1}'
+
+        self.assertEqual(
+            fragments.link(url),
+            render_to_string(
+                "model_inspector/fragments/link_secondary.html", {"url": url}
+            ),
+        )
+        self.assertEqual(
+            fragments.copy_button("home", "home<page>"),
+            render_to_string(
+                "model_inspector/fragments/copy_button.html",
+                {"app_label": "home", "model": "home<page>"},
+            ),
+        )
+        self.assertEqual(
+            fragments.check_button(1),
+            render_to_string(
+                "model_inspector/fragments/check_button.html", {"content_type_id": 1}
+            ),
+        )
+        self.assertEqual(
+            fragments.link_or_does_not_exist(None),
+            render_to_string("model_inspector/fragments/does_not_exist.html"),
+        )
+
+
+class ListingURLRegistryTestCase(TestCase):
+    def test_listing_urls(self):
+        registry = ListingURLRegistry()
+
+        self.assertEqual(
+            registry.get_url(GroupApprovalTask), "/admin/workflows/tasks/index/"
+        )
+        self.assertEqual(registry.get_url(Group), "/admin/groups/")
+        self.assertEqual(
+            registry.get_url(BlogCategory), "/admin/snippets/blog/blogcategory/"
+        )
+        self.assertEqual(registry.get_url(HomePage)(HomePage(pk=3)), "/admin/pages/3/")
+        self.assertIsNone(registry.get_url(ContentType))
+
+    def test_hook(self):
+        def listing_urls():
+            return {ContentType: "wagtailadmin_home"}
+
+        with hooks.register_temporarily(
+            "register_model_inspector_listing_urls", listing_urls
+        ):
+            registry = ListingURLRegistry()
+            self.assertEqual(registry.get_url(ContentType), "/admin/")
+
+
+class FilterChoicesTestCase(ModelInspectorTestCase):
+    @override_settings(MODEL_INSPECTOR_EXCLUDE=[("auth", "group")])
+    def test_choices(self):
+        choices = get_filter_choices()
+        self.assertIn(("group", "group"), choices["model"])
+        self.assertEqual(len(choices["app_label"]), len(set(choices["app_label"])))
+
+        exclude_choices = get_filter_choices(exclude=True)
+        self.assertNotIn(("group", "group"), exclude_choices["model"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_filter_choices(), choices)
+
+    def test_invalidated_when_content_types_change(self):
+        get_filter_choices()
+        ContentType.objects.create(app_label="stale", model="stale")
+        self.assertIn(("stale", "stale"), get_filter_choices()["app_label"])
+
+
+class ModelSearchIndexTestCase(ModelInspectorTestCase):
+    def setUp(self):
+        super().setUp()
+        search_index.clear()
+
+    def get_ids(self, *models):
+        return {ContentType.objects.get_for_model(m).pk for m in models}
+
+    def test_search(self):
+        self.assertEqual(search_index.search("blog categ"), self.get_ids(BlogCategory))
+        # substring of a field name, limited to a facet
+        ids = search_index.search("field:lug related:contenttype")
+        self.assertTrue(self.get_ids(Page, HomePage, BlogPage) <= ids)
+        self.assertNotIn(self.get_ids(BlogCategory).pop(), ids)
+        self.assertEqual(search_index.search("nothing-like-this"), set())
+
+    def test_refreshed_when_content_types_change(self):
+        search_index.search("stale")
+        ContentType.objects.create(app_label="stale", model="stale")
+        self.assertEqual(len(search_index.search("stale")), 1)
+
+    def test_index_view_search(self):
+        response = self.client.get(
+            reverse("model_inspector_index_results"), {"q": "slug blogcategory"}
+        )
+        self.assertEqual(
+            [ct.pk for ct in response.context["object_list"]],
+            list(self.get_ids(BlogCategory)),
+        )
+
+
+class FilterExcludeQuerysetTestCase(TestCase):
+    @override_settings(
+        MODEL_INSPECTOR_EXCLUDE=[("auth", "group"), ("blog", "blogpage")]
+    )
+    def test_exclude_pairs(self):
+        ContentType.objects.create(app_label="blog", model="group")
+        excluded = set(
+            ContentType.objects.values_list("app_label", "model").difference(
+                filter_exclude_queryset().values_list("app_label", "model")
+            )
+        )
+        # a cross product of the labels would also hide these
+        self.assertEqual(excluded, {("auth", "group"), ("blog", "blogpage")})
+
+    @override_settings(MODEL_INSPECTOR_EXCLUDE=[("auth", "*"), ("stale", "model")])
+    def test_exclude_wildcard_and_stale(self):
+        stale = ContentType.objects.create(app_label="stale", model="model")
+        labels = set(filter_exclude_queryset().values_list("app_label", flat=True))
+
+        self.assertNotIn("auth", labels)
+        self.assertIn("blog", labels)
+        self.assertFalse(filter_exclude_queryset().filter(pk=stale.pk).exists())
+
+    @override_settings(MODEL_INSPECTOR_EXCLUDE=[("auth", "group")])
+    def test_resolved_once(self):
+        list(filter_exclude_queryset())
+        with self.assertNumQueries(1):
+            list(filter_exclude_queryset())
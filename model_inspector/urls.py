@@ -0,0 +1,29 @@
+from django.contrib.auth.decorators import permission_required
+from django.urls import path
+from django.views.decorators.cache import never_cache
+
+from model_inspector.views import CheckView, URLsView
+
+
+def require_admin_access(view_func):
+    # Wagtail's admin url decorators only wrap sync views, so the async
+    # endpoints are included outside register_admin_urls and checked here
+    return never_cache(
+        permission_required("wagtailadmin.access_admin", raise_exception=True)(
+            view_func
+        )
+    )
+
+
+urlpatterns = [
+    path(
+        "urls/",
+        require_admin_access(URLsView.as_view()),
+        name="model_inspector_urls",
+    ),
+    path(
+        "check/",
+        require_admin_access(CheckView.as_view()),
+        name="model_inspector_check",
+    ),
+]
@@ -1,89 +1,134 @@
+import csv
+import functools
+import json
+
 import django_filters
+from asgiref.sync import sync_to_async
+from django.apps import apps
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Q
 from django.forms import CheckboxSelectMultiple
-from django.template.loader import render_to_string
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
-from wagtail.admin.admin_url_finder import AdminURLFinder
+from django.views.generic import TemplateView, View
+from openpyxl import Workbook
 from wagtail.admin.filters import WagtailFilterSet
 from wagtail.admin.ui.tables import Column
 from wagtail.admin.views import generic
-from wagtail.admin.widgets.button import HeaderButton
-from wagtail.contrib.redirects.models import Redirect
-from wagtail.documents.models import Document
-from wagtail.images.models import Image
-from wagtail.models import Collection, Task, Workflow
+from wagtail.admin.views.generic.base import WagtailAdminTemplateMixin
+from wagtail.admin.views.mixins import Echo
+from wagtail.admin.widgets.button import Button, HeaderButton
+
+from model_inspector.cache import (
+    get_cache_timeout,
+    get_filter_choices_cache_key,
+    get_sample_urls,
+)
+from model_inspector.checker import URLChecker
+from model_inspector.fingerprints import get_fingerprints
+from model_inspector.fragments import fragments
+from model_inspector.history import (
+    compare_runs,
+    get_baseline,
+    get_latency_min_delta_ms,
+    get_latency_threshold,
+    get_latest_results,
+    get_queries_threshold,
+    get_unchanged_contenttype_ids,
+    record_run,
+)
+from model_inspector.models import URL_KINDS, CheckRun, SweepJob
+from model_inspector.search import search_index
+
+URL_KIND_NAMES = [kind for kind, _label in URL_KINDS]
+
+EXPORT_CHUNK_SIZE = 100
+
+METRIC_COLUMNS = [
+    "queries",
+    "duplicate_queries",
+    "sql_time",
+    "template_time",
+    "response_size",
+]
+
+
+@functools.cache
+def get_excluded_contenttype_ids():
+    """
+    Resolve MODEL_INSPECTOR_EXCLUDE to a frozenset of ContentType ids. Entries
+    are ``(app_label, model)`` pairs, where model may be ``"*"`` to exclude a
+    whole app. Installed models resolve through ContentType's in-process cache,
+    and any leftovers (e.g. stale content types) through a single query.
+    """
+    ids = set()
+    unresolved = Q(pk__in=[])
+
+    for app_label, model_name in (
+        getattr(settings, "MODEL_INSPECTOR_EXCLUDE", None) or []
+    ):
+        try:
+            app_config = apps.get_app_config(app_label)
+            if model_name == "*":
+                models = app_config.get_models()
+            else:
+                models = [app_config.get_model(model_name)]
+        except LookupError:
+            models = []
+
+        for model in models:
+            ids.add(
+                ContentType.objects.get_for_model(model, for_concrete_model=False).pk
+            )
+
+        if model_name == "*":
+            unresolved |= Q(app_label=app_label)
+        elif not models:
+            unresolved |= Q(app_label=app_label, model=model_name)
+
+    ids.update(
+        ContentType.objects.filter(unresolved)
+        .exclude(pk__in=ids)
+        .values_list("pk", flat=True)
+    )
+    return frozenset(ids)
 
 
 def filter_exclude_queryset(qs=None):
     # adding this here so it can be used across the IndexView and the FilterSet
-    if not qs:
+    if qs is None:
         qs = ContentType.objects.all()
 
-    if (
-        hasattr(settings, "MODEL_INSPECTOR_EXCLUDE")
-        and settings.MODEL_INSPECTOR_EXCLUDE
-    ):
-        exclude_app_model = settings.MODEL_INSPECTOR_EXCLUDE
-        return qs.exclude(
-            app_label__in=[app_label for app_label, _ in exclude_app_model],
-            model__in=[model for _, model in exclude_app_model],
-        )
+    excluded_ids = get_excluded_contenttype_ids()
+    if excluded_ids:
+        return qs.exclude(pk__in=excluded_ids)
     else:
         return qs
 
-    # if hasattr(settings, "MODEL_INSPECTOR_EXCLUDE") and settings.MODEL_INSPECTOR_EXCLUDE and qs is None:
-    #     exclude_app_model = settings.MODEL_INSPECTOR_EXCLUDE
-    #     return ContentType.objects.exclude(
-    #         app_label__in=[app_label for app_label, _ in exclude_app_model],
-    #         model__in=[model for _, model in exclude_app_model],
-    #     )
-    # elif qs is not None:
-    #     exclude_app_model = settings.MODEL_INSPECTOR_EXCLUDE
-    #     return qs.exclude(
-    #         app_label__in=[app_label for app_label, _ in exclude_app_model],
-    #         model__in=[model for _, model in exclude_app_model],
-    #     )
-    # else:
-
-    # return ContentType.objects.all()
-
-
-class ModelInspectorAdminURLFinder(AdminURLFinder):
-    def get_listing_url(self, instance):
-        if not instance:
-            return None
-
-        model = type(instance)
-
-        if model == Workflow:
-            return "/admin/workflows/list/"
-        elif model == Task:
-            return "/admin/workflows/tasks/index/"
-        elif model == Collection:
-            return "/admin/collections/"
-        elif model == Document:
-            return "/admin/documents/"
-        elif model == Image:
-            return "/admin/images/"
-        elif model == Redirect:
-            return "/admin/redirects/"
-
-        # Fallback to manipluating the admin edit url parts
-        try:
-            parts = super().get_edit_url(instance).strip("/").split("/")
-            try:
-                pos = parts.index("edit")
-            except ValueError:
-                pos = len(parts)
-
-            return f'/{"/".join(parts[:pos])}/'
-        except AttributeError:
-            return None
-
 
-admin_url_finder = ModelInspectorAdminURLFinder()
+def get_filter_choices(exclude=False):
+    """
+    Return the app_label and model filter choices, computed with one distinct
+    query each and cached until the next migrate.
+    """
+    key = get_filter_choices_cache_key(exclude)
+    choices = cache.get(key)
+    if choices is None:
+        qs = filter_exclude_queryset() if exclude else ContentType.objects.all()
+        choices = {
+            field: [
+                (value, value)
+                for value in qs.order_by(field).values_list(field, flat=True).distinct()
+            ]
+            for field in ["app_label", "model"]
+        }
+        cache.set(key, choices, get_cache_timeout())
+    return choices
 
 
 class IndexViewFilterSet(WagtailFilterSet):
@@ -107,22 +152,9 @@ class IndexViewFilterSet(WagtailFilterSet):
     def __init__(self, data=None, queryset=None, *, request=None, prefix=None):
         super().__init__(data=data, queryset=queryset, request=request, prefix=prefix)
 
-        if not self.request.GET.get("exclude"):
-            self.filters["app_label"].extra["choices"] = sorted(
-                {(ct.app_label, ct.app_label) for ct in self.queryset}
-            )
-
-            self.filters["model"].extra["choices"] = sorted(
-                [(ct.model, ct.model) for ct in self.queryset]
-            )
-        else:
-            self.filters["app_label"].extra["choices"] = sorted(
-                {(ct.app_label, ct.app_label) for ct in filter_exclude_queryset()}
-            )
-
-            self.filters["model"].extra["choices"] = sorted(
-                [(ct.model, ct.model) for ct in filter_exclude_queryset()]
-            )
+        choices = get_filter_choices(exclude=bool(self.request.GET.get("exclude")))
+        self.filters["app_label"].extra["choices"] = choices["app_label"]
+        self.filters["model"].extra["choices"] = choices["model"]
 
 
 class IndexView(generic.IndexView):
@@ -137,12 +169,40 @@ class IndexView(generic.IndexView):
     paginate_by = 50
     table_classname = "model-inspector listing"
 
+    FORMAT_JSONL = "jsonl"
+    FORMATS = (*generic.IndexView.FORMATS, FORMAT_JSONL)
+    export_filename = "model-inspector"
+    list_export = [
+        "app_label",
+        "model",
+        "admin_url",
+        "admin_status",
+        "frontend_url",
+        "frontend_status",
+        "listing_url",
+        "listing_status",
+    ]
+    export_headings = {
+        "model": _("Model"),
+        "admin_url": _("Admin Page"),
+        "admin_status": _("Admin Page status"),
+        "frontend_url": _("Frontend Page"),
+        "frontend_status": _("Frontend Page status"),
+        "listing_url": _("Listing Page"),
+        "listing_status": _("Listing Page status"),
+    }
+
     columns = [
         Column("model", label=_("Model"), sort_key="model"),
         Column("admin_edit_url", label=_("Admin Page")),
         Column("frontend_url", label=_("Frontend Page")),
         Column("listing", label=_("Listing Page")),
         Column("actions", label=_("Actions"), classname="check-actions"),
+        Column("queries", label=_("Queries")),
+        Column("duplicate_queries", label=_("Duplicate Queries")),
+        Column("sql_time", label=_("SQL Time")),
+        Column("template_time", label=_("Template Time")),
+        Column("response_size", label=_("Response Size")),
         Column("exclude", label=_("MODEL_INSPECTOR_EXCLUDE entry to hide this model")),
         Column("app_label", label=_("App label"), sort_key="app_label"),
     ]
@@ -150,6 +210,31 @@ class IndexView(generic.IndexView):
     @cached_property
     def header_buttons(self):
         buttons = super().header_buttons
+        buttons.append(
+            HeaderButton(
+                label=_("Check History"),
+                url=reverse("model_inspector_check_runs"),
+                icon_name="history",
+            )
+        )
+        # queues a sweep for the run_inspector_worker command and shows its
+        # progress, see model_inspector.js
+        buttons.append(
+            HeaderButton(
+                label=_("Run in Background"),
+                url=reverse("model_inspector_sweeps"),
+                attrs={"data-model-inspector-sweep": "all"},
+                icon_name="resubmit",
+            )
+        )
+        buttons.append(
+            HeaderButton(
+                label=_("Run Changed in Background"),
+                url=reverse("model_inspector_sweeps"),
+                attrs={"data-model-inspector-sweep": "changed"},
+                icon_name="resubmit",
+            )
+        )
 
         if (
             hasattr(settings, "MODEL_INSPECTOR_EXCLUDE")
@@ -184,66 +269,327 @@ class IndexView(generic.IndexView):
         else:
             return filter_exclude_queryset(qs)
 
+    def search_queryset(self, queryset):
+        # names, fields, related models and viewsets, see model_inspector.search
+        if not self.is_searching:
+            return queryset
+        return queryset.filter(pk__in=search_index.search(self.search_query))
+
+    @cached_property
+    def progressive(self):
+        # render the rows straight away and let the browser fetch the urls
+        return getattr(settings, "MODEL_INSPECTOR_PROGRESSIVE", False)
+
+    def get(self, request, *args, **kwargs):
+        if self.is_export:
+            # skip the listing context, which loads the whole queryset to count
+            # it, the export streams it and resolves the urls in chunks
+            return self.as_spreadsheet(self.get_queryset(), request.GET.get("export"))
+        return super().get(request, *args, **kwargs)
+
     def get_context_data(self, *args, **kwargs):
         ctx = super().get_context_data(*args, **kwargs)
 
-        for contenttype in ctx["object_list"]:
-            instance = contenttype.model_class().objects.first()
-
-            # SPECIAL CASE: Collection
-            if isinstance(instance, Collection):
-                root = Collection.get_first_root_node()
-                instance = root.get_children().first()
-
-            # FRONTEND URL
-            frontend_instance_url = None
-            try:
-                frontend_instance_url = instance.get_url()
-                contenttype.frontend_url = render_to_string(
-                    "model_inspector/fragments/link_secondary.html",
-                    {"url": frontend_instance_url},
-                )
-            except AttributeError:
-                contenttype.frontend_url = render_to_string(
-                    "model_inspector/fragments/does_not_exist.html",
-                )
+        if not self.progressive:
+            samples = get_sample_urls(ctx["object_list"])
 
-            # ADMIN URL
-            admin_instance_url = admin_url_finder.get_edit_url(instance)
-            if admin_instance_url:
-                contenttype.admin_edit_url = render_to_string(
-                    "model_inspector/fragments/link_secondary.html",
-                    {"url": admin_instance_url},
-                )
+        for contenttype in ctx["object_list"]:
+            # FRONTEND, ADMIN AND LISTING URLS
+            if self.progressive:
+                contenttype.frontend_url = fragments.pending(contenttype.pk, "frontend")
+                contenttype.admin_edit_url = fragments.pending(contenttype.pk, "admin")
+                contenttype.listing = fragments.pending(contenttype.pk, "listing")
             else:
-                contenttype.admin_edit_url = render_to_string(
-                    "model_inspector/fragments/does_not_exist.html",
+                urls = samples[contenttype.pk]
+                contenttype.frontend_url = fragments.frontend_links(
+                    urls["frontend"], urls["frontend_matrix"]
                 )
-
-            # LISTING URL
-            listing_instance_url = admin_url_finder.get_listing_url(instance)
-            if listing_instance_url:
-                contenttype.listing = render_to_string(
-                    "model_inspector/fragments/link_secondary.html",
-                    {"url": listing_instance_url},
-                )
-            else:
-                contenttype.listing = render_to_string(
-                    "model_inspector/fragments/does_not_exist.html",
+                contenttype.admin_edit_url = fragments.link_or_does_not_exist(
+                    urls["admin"]
                 )
+                contenttype.listing = fragments.link_or_does_not_exist(urls["listing"])
 
             # ACTIONS
-            contenttype.actions = render_to_string(
-                "model_inspector/fragments/check_button.html",
-            )
+            contenttype.actions = fragments.check_button(contenttype.pk)
+
+            # METRICS, filled in by the check action
+            for metric in METRIC_COLUMNS:
+                setattr(contenttype, metric, fragments.metric(metric))
 
             # EXCLUDE
-            contenttype.exclude = render_to_string(
-                "model_inspector/fragments/copy_button.html",
-                {
-                    "app_label": contenttype.app_label,
-                    "model": contenttype.model,
-                },
+            contenttype.exclude = fragments.copy_button(
+                contenttype.app_label, contenttype.model
             )
 
         return ctx
+
+    def iter_export_rows(self, queryset):
+        """
+        Yield a row dict per content type, resolving the sample urls and latest
+        check results a chunk of EXPORT_CHUNK_SIZE content types at a time.
+        """
+        chunk = []
+        for contenttype in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            chunk.append(contenttype)
+            if len(chunk) == EXPORT_CHUNK_SIZE:
+                yield from self.get_export_rows(chunk)
+                chunk = []
+        if chunk:
+            yield from self.get_export_rows(chunk)
+
+    def get_export_rows(self, contenttypes):
+        samples = get_sample_urls(contenttypes)
+        results = get_latest_results([ct.pk for ct in contenttypes])
+
+        for contenttype in contenttypes:
+            row = {"app_label": contenttype.app_label, "model": contenttype.model}
+            for kind in URL_KIND_NAMES:
+                result = results.get((contenttype.pk, kind))
+                row[f"{kind}_url"] = samples[contenttype.pk][kind]
+                if result is not None:
+                    row[f"{kind}_status"] = result.exception or result.status
+                else:
+                    row[f"{kind}_status"] = None
+            yield row
+
+    def stream_csv(self, queryset):
+        writer = csv.DictWriter(Echo(), fieldnames=self.list_export)
+        yield writer.writerow(
+            {field: self.get_heading(queryset, field) for field in self.list_export}
+        )
+        for row in self.iter_export_rows(queryset):
+            yield self.write_csv_row(writer, row)
+
+    def stream_jsonl(self, queryset):
+        for row in self.iter_export_rows(queryset):
+            yield json.dumps(row) + "\n"
+
+    def write_xlsx(self, queryset, output):
+        workbook = Workbook(write_only=True, iso_dates=True)
+        worksheet = workbook.create_sheet(title="Sheet1")
+        worksheet.append(
+            self.get_heading(queryset, field) for field in self.list_export
+        )
+        for row in self.iter_export_rows(queryset):
+            worksheet.append(self.generate_xlsx_row(worksheet, row))
+        workbook.save(output)
+
+    def write_jsonl_response(self, queryset):
+        response = StreamingHttpResponse(
+            self.stream_jsonl(queryset), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.get_filename()}.jsonl"'
+        )
+        return response
+
+    def as_spreadsheet(self, queryset, spreadsheet_format):
+        if spreadsheet_format == self.FORMAT_JSONL:
+            return self.write_jsonl_response(queryset)
+        return super().as_spreadsheet(queryset, spreadsheet_format)
+
+    @cached_property
+    def header_more_buttons(self):
+        buttons = super().header_more_buttons.copy()
+        buttons.append(
+            Button(
+                _("Download JSONL"),
+                url=self.get_export_url(self.FORMAT_JSONL),
+                icon_name="download",
+                priority=110,
+            )
+        )
+        return buttons
+
+
+class URLsView(View):
+    """
+    Resolve the sample instance urls for the content type ids given as ``id``
+    query parameters, for filling in the table in progressive mode.
+    """
+
+    async def get(self, request):
+        try:
+            ids = [int(pk) for pk in request.GET.getlist("id")]
+        except ValueError:
+            return HttpResponseBadRequest("Expected integer content type ids")
+
+        contenttypes = [
+            contenttype
+            async for contenttype in ContentType.objects.filter(pk__in=ids).aiterator()
+        ]
+        samples = await sync_to_async(get_sample_urls)(contenttypes)
+
+        results = {}
+        for pk, urls in samples.items():
+            results[pk] = {
+                kind: {
+                    "url": urls[kind],
+                    "html": fragments.link_or_does_not_exist(urls[kind]),
+                }
+                for kind in ["admin", "listing"]
+            }
+            results[pk]["frontend"] = {
+                "url": urls["frontend"],
+                "html": fragments.frontend_links(
+                    urls["frontend"], urls["frontend_matrix"]
+                ),
+            }
+
+        return JsonResponse({"results": results})
+
+
+def is_valid_target(target):
+    return (
+        isinstance(target, dict)
+        and isinstance(target.get("content_type"), int)
+        and target.get("kind") in URL_KIND_NAMES
+    )
+
+
+class CheckView(View):
+    """
+    Probe a batch of URLs in-process and return their status, latency, query
+    and template timings, response size and any exception raised as JSON.
+    Expects a JSON body of ``{"urls": [...]}``.
+
+    If the body also has a ``targets`` list of ``{"content_type", "kind"}``
+    for each url, the results are saved as a CheckRun along with each content
+    type's fingerprint. With ``"changed_only": true`` as well, the urls of
+    content types that passed their last check with the same fingerprint are
+    skipped and returned as ``{"url", "skipped": true}``.
+    """
+
+    async def post(self, request):
+        try:
+            body = json.loads(request.body)
+            urls = body["urls"]
+        except (ValueError, KeyError, TypeError):
+            return HttpResponseBadRequest("Expected a JSON body with a list of urls")
+
+        if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+            return HttpResponseBadRequest("Expected a JSON body with a list of urls")
+
+        targets = body.get("targets")
+        if targets is not None and (
+            not isinstance(targets, list)
+            or len(targets) != len(urls)
+            or not all(is_valid_target(target) for target in targets)
+        ):
+            return HttpResponseBadRequest("Expected a target for each url")
+
+        skipped = set()
+        if targets is not None:
+            ids = {target["content_type"] for target in targets}
+            contenttypes = [
+                contenttype
+                async for contenttype in ContentType.objects.filter(pk__in=ids)
+            ]
+            if len(contenttypes) != len(ids):
+                return HttpResponseBadRequest("Unknown content type id")
+
+            fingerprints = await sync_to_async(get_fingerprints)(contenttypes)
+            if body.get("changed_only"):
+                skipped = await sync_to_async(get_unchanged_contenttype_ids)(
+                    fingerprints
+                )
+
+        checked = [
+            index
+            for index in range(len(urls))
+            if targets is None or targets[index]["content_type"] not in skipped
+        ]
+
+        user = await request.auser()
+        checker = URLChecker(user=user, host=request.get_host())
+        checked_results = await checker.acheck([urls[index] for index in checked])
+
+        if targets is not None and checked:
+            await sync_to_async(record_run)(
+                [
+                    {
+                        **targets[index],
+                        "fingerprint": fingerprints[targets[index]["content_type"]],
+                        **result,
+                    }
+                    for index, result in zip(checked, checked_results)
+                ],
+                user=user,
+                source="admin",
+            )
+
+        results = [{"url": url, "skipped": True} for url in urls]
+        for index, result in zip(checked, checked_results):
+            results[index] = result
+
+        return JsonResponse({"results": results})
+
+
+class SweepJobsView(View):
+    """
+    Queue a SweepJob of every model, or with ``{"changed_only": true}`` as the
+    JSON body of the ones that changed since they last passed, and return its
+    progress.
+    """
+
+    def post(self, request):
+        try:
+            body = json.loads(request.body or "{}")
+        except ValueError:
+            return HttpResponseBadRequest("Expected a JSON body")
+
+        job = SweepJob.objects.create(
+            user=request.user,
+            changed_only=bool(isinstance(body, dict) and body.get("changed_only")),
+        )
+        return JsonResponse(
+            {
+                **job.get_progress(),
+                "progress_url": reverse("model_inspector_sweep", args=[job.pk]),
+            },
+            status=201,
+        )
+
+
+class SweepJobView(View):
+    """
+    Return the progress of a SweepJob: completion percentage, URLs checked
+    per second and failures so far.
+    """
+
+    def get(self, request, job_id):
+        job = get_object_or_404(SweepJob, pk=job_id)
+        return JsonResponse(job.get_progress())
+
+
+class CheckRunView(WagtailAdminTemplateMixin, TemplateView):
+    """
+    Compare a check run, the latest one by default, against its baseline and
+    list the URLs that regressed first.
+    """
+
+    page_title = _("Model Inspector")
+    page_subtitle = _("Check history")
+    header_icon = "history"
+    template_name = "model_inspector/check_run.html"
+
+    def get_run(self):
+        run_id = self.kwargs.get("run_id")
+        if run_id is not None:
+            return get_object_or_404(CheckRun, pk=run_id)
+        return CheckRun.objects.first()
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        run = self.get_run()
+        baseline = get_baseline(run) if run else None
+
+        ctx["run"] = run
+        ctx["baseline"] = baseline
+        ctx["rows"] = compare_runs(run, baseline) if run else []
+        ctx["regressions"] = sum(row["regressed"] for row in ctx["rows"])
+        ctx["recent_runs"] = CheckRun.objects.all()[:20]
+        ctx["latency_threshold"] = get_latency_threshold()
+        ctx["latency_min_delta_ms"] = get_latency_min_delta_ms()
+        ctx["queries_threshold"] = get_queries_threshold()
+        return ctx
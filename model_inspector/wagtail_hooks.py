@@ -6,7 +6,7 @@ from wagtail import hooks
 from wagtail.admin.menu import AdminOnlyMenuItem, Menu, SubmenuMenuItem
 from wagtail.admin.ui.components import Component
 
-from model_inspector.views import IndexView
+from model_inspector.views import CheckRunView, IndexView, SweepJobsView, SweepJobView
 
 
 @hooks.register("insert_global_admin_js")
@@ -34,6 +34,26 @@ def register_admin_urls():
             IndexView.as_view(results_only=True),
             name="model_inspector_index_results",
         ),
+        path(
+            "model-inspector/runs/",
+            CheckRunView.as_view(),
+            name="model_inspector_check_runs",
+        ),
+        path(
+            "model-inspector/runs/<int:run_id>/",
+            CheckRunView.as_view(),
+            name="model_inspector_check_run",
+        ),
+        path(
+            "model-inspector/sweeps/",
+            SweepJobsView.as_view(),
+            name="model_inspector_sweeps",
+        ),
+        path(
+            "model-inspector/sweeps/<int:job_id>/",
+            SweepJobView.as_view(),
+            name="model_inspector_sweep",
+        ),
     ]
 
 